@@ -3,29 +3,64 @@
 FastAPI entrypoint that serves static assets and image search APIs.
 """
 
+import array
+import asyncio
+import functools
+import hashlib
 import os
-import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 import fastapi_cdn_host
-from dotenv import load_dotenv
-from fastapi import APIRouter, FastAPI, File, UploadFile
+from fastapi import APIRouter, Depends, FastAPI, File, Request, UploadFile
 from fastapi.responses import FileResponse
 from starlette import staticfiles
 
 from common.db import build_client
+from common.embeddings import embed_img_bytes
 from common.image_store import OBImageStore
 from common.logger import get_logger
 
 # Logger for backend app
 logger = get_logger(__name__)
 
-# Load environment variables for DB and app initialization
-load_dotenv()
-logger.info("Environment variables loaded for backend.")
+# Read image table name (default: image_search)
+table_name = os.getenv("IMG_TABLE_NAME", "image_search")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the image store and warm it up so the first search doesn't pay
+    the setup cost.
+    """
+    # Built per worker process at startup rather than at import time
+    app.state.store = OBImageStore(
+        client=build_client(),
+        table_name=table_name,
+    )
+    # The store's client is a single pymysql connection, which is not
+    # thread-safe: every database call runs on this one thread
+    app.state.db_executor = ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="image-db"
+    )
+    logger.info("Image store initialized for table '%s'.", table_name)
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(app.state.db_executor, app.state.store.warmup)
+    except Exception as e:
+        logger.warning("Image store warmup failed: %s", e)
+    try:
+        yield
+    finally:
+        app.state.db_executor.shutdown(wait=True)
+
 
 # Create the FastAPI app and patch docs to use CDN assets
-app = FastAPI(title="Image Search App", version="0.1.0")
+app = FastAPI(title="Image Search App", version="0.1.0", lifespan=lifespan)
 fastapi_cdn_host.patch_docs(app)
 logger.info("FastAPI app initialized.")
 
@@ -38,37 +73,102 @@ logger.info("Mounted static assets from %s.", dist_dir)
 # Create an API router and mount it under /api
 router = APIRouter()
 
-# Read image table name (default: image_search)
-table_name = os.getenv("IMG_TABLE_NAME", "image_search")
+# Archives loaded from the Streamlit UI are extracted under this directory;
+# it is mounted once so its subdirectories need no mounts of their own
+extracted_dir = base_dir / "data" / "tmp" / "extracted"
+extracted_root = str(extracted_dir)
+EXTRACTED_URL_PREFIX = "/images/extracted"
+app.mount(
+    EXTRACTED_URL_PREFIX,
+    staticfiles.StaticFiles(directory=extracted_root, check_dir=False),
+    name="static_extracted",
+)
 
-# Track mounted image directories to avoid duplicate mounts
+# Track mounted image directories outside extracted_dir to avoid duplicate mounts
 image_dirs: dict[str, int] = {}
 
-# Initialize the image vector store client
-store = OBImageStore(
-    client=build_client(),
-    table_name=table_name,
-)
-logger.info("Image store initialized for table '%s'.", table_name)
+# Static URL prefix of every image directory seen so far (mounted or under
+# extracted_dir); entries are never evicted, since mounts are never removed
+dir_prefixes: dict[str, str] = {}
+
+# Each mount adds a route that Starlette scans linearly on every request
+MAX_MOUNTS = 64
 
+# Query embeddings keyed by a digest of the uploaded image bytes. Stored as
+# packed float32 (4 KB per 1024-dim vector instead of ~32 KB of boxed floats);
+# the database keeps float32 vectors too, so no precision is lost
+_EMBEDDING_CACHE_SIZE = 1024
+_embedding_cache: OrderedDict[bytes, array.array] = OrderedDict()
+
+# Search responses keyed by (digest, top_k, table); the corpus is append-mostly,
+# so a short TTL keeps repeated uploads cheap without hiding new images for long
+_RESULT_CACHE_SIZE = 1024
+_RESULT_CACHE_TTL = 30.0
+_result_cache: OrderedDict[tuple, tuple[float, list[dict[str, object]]]] = OrderedDict()
 
 def replace_path(path: str) -> str:
     """
     Map a local directory to a static URL prefix and return it.
-    """
 
-    # Mount the directory the first time it appears
-    if path not in image_dirs:
-        image_dirs[path] = len(image_dirs) + 1
+    Prefixes are remembered in dir_prefixes, so each directory is mounted
+    at most once no matter how often it appears in results.
+    """
+    prefix = dir_prefixes.get(path)
+    if prefix is not None:
+        return prefix
+
+    # Directories under the extraction root are served by its single mount
+    if path == extracted_root or path.startswith(extracted_root + os.sep):
+        rel = path[len(extracted_root) :].strip(os.sep).replace(os.sep, "/")
+        prefix = f"{EXTRACTED_URL_PREFIX}/{rel}/" if rel else f"{EXTRACTED_URL_PREFIX}/"
+
+    # Mount any other directory the first time it appears
+    else:
+        if len(image_dirs) >= MAX_MOUNTS:
+            raise RuntimeError(
+                f"Too many image directories mounted (limit {MAX_MOUNTS}); "
+                f"load images under {extracted_root} instead"
+            )
+        index = len(image_dirs) + 1
         logger.info("Mounting image directory %s.", path)
         app.mount(
-            f"/images/{image_dirs[path]}",
+            f"/images/{index}",
             staticfiles.StaticFiles(directory=path),
-            name=f"static_{image_dirs[path]}",
+            name=f"static_{index}",
         )
+        # Recorded only once the mount succeeded
+        image_dirs[path] = index
+        prefix = f"/images/{index}/"
 
-    # Return the static URL prefix for this directory
-    return f"/images/{image_dirs[path]}/"
+    dir_prefixes[path] = prefix
+    return prefix
+
+
+def _cache_get(cache: OrderedDict, key):
+    """
+    Return a cached value and mark it most recently used, or None.
+    """
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache: OrderedDict, key, value, max_size: int) -> None:
+    """
+    Store a value, evicting the least recently used entries beyond max_size.
+    """
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > max_size:
+        cache.popitem(last=False)
+
+
+def get_store(request: Request) -> OBImageStore:
+    """
+    Return the image store created at application startup.
+    """
+    return request.app.state.store
 
 
 @app.get("/")
@@ -81,29 +181,56 @@ async def read_index() -> FileResponse:
 
 @router.post("/search")
 async def search_image(
+    request: Request,
     file: UploadFile = File(...),
     top_k: int = 10,
+    store: OBImageStore = Depends(get_store),
 ) -> list[dict[str, object]]:
     """
     Accept an uploaded image and return top-k similar results.
     """
 
-    # Save the uploaded image to a temp file for embedding
+    # Read the uploaded image into memory; it is embedded straight from bytes
     content = await file.read()
-    file_type = os.path.splitext(file.filename)[1]
-    tf = tempfile.NamedTemporaryFile(suffix=file_type)
-    tf.write(content)
-    tf.flush()
+    file_type = os.path.splitext(file.filename or "")[1] or "jpeg"
     logger.info("Received image %s for search (top_k=%s).", file.filename, top_k)
 
-    # Search similar images in the vector store
-    res = store.search(tf.name, limit=top_k)
-
-    # Replace local paths with mounted static paths
+    # Identical uploads map to the same digest; serve them from the caches.
+    # The caches are only touched from the event loop thread, so no locking
+    digest = hashlib.blake2b(content, digest_size=16).digest()
+    result_key = (digest, top_k, store.table_name)
+    cached = _cache_get(_result_cache, result_key)
+    if cached is not None and cached[0] > time.monotonic():
+        logger.info("Search served from cache with %s results.", len(cached[1]))
+        return [dict(r) for r in cached[1]]
+
+    # The embedding + DB query are blocking, so run them off the event loop.
+    # Embedding calls are independent API requests and may run concurrently;
+    # the DB query goes to the single thread that owns the connection
+    # The packed vector is searched as-is; the query packs it back to
+    # float32 bytes either way
+    embedding = _cache_get(_embedding_cache, digest)
+    if embedding is None:
+        embedding = array.array(
+            "f", await asyncio.to_thread(embed_img_bytes, content, file_type)
+        )
+        _cache_put(_embedding_cache, digest, embedding, _EMBEDDING_CACHE_SIZE)
+    res = await asyncio.get_running_loop().run_in_executor(
+        request.app.state.db_executor,
+        functools.partial(store.search_embedding, embedding, limit=top_k),
+    )
+
+    # Replace local paths with mounted static paths. Paths are stored
+    # absolute at ingest time, so a single split is enough here
     for r in res:
-        file_path = os.path.abspath(r["file_path"])
-        dst = os.path.dirname(file_path)
-        r["file_path"] = replace_path(dst) + os.path.basename(file_path)
+        dst, _, file_name = r["file_path"].rpartition(os.sep)
+        r["file_path"] = replace_path(dst) + file_name
+    _cache_put(
+        _result_cache,
+        result_key,
+        (time.monotonic() + _RESULT_CACHE_TTL, [dict(r) for r in res]),
+        _RESULT_CACHE_SIZE,
+    )
     logger.info("Search completed with %s results.", len(res))
     return res
 
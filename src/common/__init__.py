@@ -1,3 +1,8 @@
 """
 Common utilities for image search.
 """
+
+from dotenv import load_dotenv
+
+# Load environment variables from a .env file once, for every entry point
+load_dotenv()
@@ -0,0 +1,110 @@
+"""
+Local disk cache for image embeddings and captions.
+
+Entries are keyed by a cheap file fingerprint (size, mtime and the first and
+last 64 KiB of content) combined with the model settings, so re-ingesting an
+unchanged directory skips the embedding and caption API calls.
+"""
+
+import array
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Iterable, Optional, Sequence
+
+from .logger import get_logger
+
+# Bytes hashed from each end of a file when fingerprinting
+FINGERPRINT_CHUNK_SIZE = 64 * 1024
+
+# Logger for this module
+_logger = get_logger(__name__)
+
+
+def file_fingerprint(path: str, namespace: bytes = b"") -> bytes:
+    """
+    Return a 16-byte fingerprint of a file without reading all of it.
+
+    ``namespace`` is mixed into the digest, e.g. to separate entries
+    produced by different models.
+    """
+    digest = hashlib.blake2b(namespace, digest_size=16)
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        digest.update(f"{st.st_size}:{st.st_mtime_ns}".encode("ascii"))
+        digest.update(f.read(FINGERPRINT_CHUNK_SIZE))
+        if st.st_size > FINGERPRINT_CHUNK_SIZE:
+            f.seek(max(FINGERPRINT_CHUNK_SIZE, st.st_size - FINGERPRINT_CHUNK_SIZE))
+            digest.update(f.read(FINGERPRINT_CHUNK_SIZE))
+    return digest.digest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of (embedding, caption) pairs keyed by fingerprint.
+
+    A single connection is shared between threads and guarded by a lock.
+    An empty caption means none was generated yet; the embedding is still
+    valid and only the caption needs retrying.
+
+    Example:
+        cache = EmbeddingCache("/path/to/cache.sqlite3")
+        hits = cache.get_many([key])
+        cache.put_many([(key, embedding, caption)])
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS image_cache ("
+            "key BLOB PRIMARY KEY, embedding BLOB NOT NULL, caption TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        _logger.info("Opened embedding cache at %s", db_path)
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, tuple[array.array, str]]:
+        """Return cached (float32 embedding, caption) pairs for the keys present."""
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, embedding, caption FROM image_cache WHERE key IN ({placeholders})",
+                keys,
+            ).fetchall()
+        hits = {}
+        for key, blob, caption in rows:
+            embedding = array.array("f")
+            embedding.frombytes(blob)
+            hits[key] = (embedding, caption)
+        return hits
+
+    def put_many(self, items: Iterable[tuple[bytes, Sequence[float], str]]) -> None:
+        """Insert or replace (key, embedding, caption) entries."""
+        rows = [
+            (key, array.array("f", embedding).tobytes(), caption)
+            for key, embedding, caption in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO image_cache (key, embedding, caption) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+
+def open_cache(db_path: Optional[str]) -> Optional[EmbeddingCache]:
+    """Open the cache at db_path, or return None if disabled or unavailable."""
+    if not db_path:
+        return None
+    try:
+        return EmbeddingCache(db_path)
+    except (OSError, sqlite3.Error) as e:
+        _logger.warning("Embedding cache disabled, failed to open %s: %s", db_path, e)
+        return None
@@ -2,48 +2,151 @@
 Archive extraction helpers for loading image bundles.
 """
 
+import os
+import shutil
+import subprocess
 import tarfile
 import zipfile
 from os import path
+from typing import BinaryIO, Optional
 
 from .logger import get_logger
 
 # Logger for archive utilities
 logger = get_logger(__name__)
 
-# Mapping from mime-like extensions to tarfile read modes
+# Mapping from archive file extensions to streaming tarfile read modes
 tar_mode_mapping = {
-    "application/x-tar": "r",
-    "application/gzip": "r:gz",
-    "application/x-bzip2": "r:bz2",
-    "application/x-xz": "r:xz",
+    ".tar": "r|",
+    ".gz": "r|gz",
+    ".bz2": "r|bz2",
+    ".xz": "r|xz",
 }
 
+# Chunk size used when streaming archive data to disk
+COPY_BUFFER_SIZE = 1 << 20
+
+
+def save_stream(src: BinaryIO, target: str, buffer_size: int = COPY_BUFFER_SIZE) -> None:
+    """
+    Stream a binary file object to a target path in fixed-size chunks.
+
+    Memory use stays bounded by buffer_size regardless of the input size.
+    In-memory sources (e.g. Streamlit uploads, which are BytesIO) are
+    written straight from their buffer without copying.
+    """
+    with open(target, "wb") as dst:
+        getbuffer = getattr(src, "getbuffer", None)
+        if getbuffer is not None:
+            with getbuffer() as buffer:
+                # Large writes go past the file buffer straight to the OS
+                dst.write(buffer[src.tell():])
+            src.seek(0, os.SEEK_END)
+        else:
+            shutil.copyfileobj(src, dst, length=buffer_size)
+    logger.info("Saved stream to %s", target)
+
 
 def extract_bundle(source: str, target: str) -> None:
     """
     Extract an archive to a target directory.
 
     Supported formats: zip, tar, gz, bz2, xz.
+
+    Members are streamed to disk with a large copy buffer. Only regular
+    files and directories are extracted, and members resolving outside
+    the target directory are skipped.
     """
     file_ext = path.splitext(source)[1]
-
-    # Handle zip files
-    if file_ext == ".zip":
-        logger.info("Extracting zip archive %s to %s", source, target)
-        with zipfile.ZipFile(source, "r") as zip_ref:
-            zip_ref.extractall(target)
-
-    # Handle tar-based archives
-    elif file_ext in [
-        ".tar",
-        ".gz",
-        ".bz2",
-        ".xz",
-    ]:
-        logger.info("Extracting tar archive %s to %s", source, target)
-        with tarfile.open(source, tar_mode_mapping[file_ext]) as tar:
-            tar.extractall(target)
-    else:
+    if file_ext != ".zip" and file_ext not in tar_mode_mapping:
         logger.error("Unsupported archive type: %s", file_ext)
         raise ValueError("Unsupported file type")
+
+    os.makedirs(target, exist_ok=True)
+    with open(source, "rb") as src:
+        _fadvise(src.fileno(), "POSIX_FADV_SEQUENTIAL")
+        try:
+            # Handle zip files
+            if file_ext == ".zip":
+                logger.info("Extracting zip archive %s to %s", source, target)
+                _extract_zip(src, target)
+
+            # Handle tar-based archives
+            else:
+                logger.info("Extracting tar archive %s to %s", source, target)
+                if file_ext == ".gz" and shutil.which("pigz"):
+                    _extract_tar_pigz(source, target)
+                else:
+                    with tarfile.open(fileobj=src, mode=tar_mode_mapping[file_ext]) as tar:
+                        _extract_tar(tar, target)
+        finally:
+            # The archive is read once; don't keep it in the page cache
+            _fadvise(src.fileno(), "POSIX_FADV_DONTNEED")
+
+
+def _extract_zip(src: BinaryIO, target: str) -> None:
+    with zipfile.ZipFile(src, "r") as zip_ref:
+        for info in zip_ref.infolist():
+            dest = _member_path(target, info.filename)
+            if dest is None:
+                continue
+            if info.is_dir():
+                os.makedirs(dest, exist_ok=True)
+                continue
+            os.makedirs(path.dirname(dest), exist_ok=True)
+            with zip_ref.open(info) as member, open(dest, "wb") as out:
+                shutil.copyfileobj(member, out, length=COPY_BUFFER_SIZE)
+
+
+def _extract_tar(tar: tarfile.TarFile, target: str) -> None:
+    for member in tar:
+        dest = _member_path(target, member.name)
+        if dest is None:
+            continue
+        if member.isdir():
+            os.makedirs(dest, exist_ok=True)
+            continue
+        if not member.isfile():
+            logger.info("Skipping non-regular archive member %s", member.name)
+            continue
+        extracted = tar.extractfile(member)
+        if extracted is None:
+            continue
+        os.makedirs(path.dirname(dest), exist_ok=True)
+        with extracted, open(dest, "wb") as out:
+            shutil.copyfileobj(extracted, out, length=COPY_BUFFER_SIZE)
+
+
+def _extract_tar_pigz(source: str, target: str) -> None:
+    """Extract a gzip tarball, decompressing with parallel pigz."""
+    logger.info("Decompressing %s with pigz", source)
+    proc = subprocess.Popen(["pigz", "-dc", source], stdout=subprocess.PIPE)
+    assert proc.stdout is not None
+    try:
+        with tarfile.open(fileobj=proc.stdout, mode="r|") as tar:
+            _extract_tar(tar, target)
+    finally:
+        proc.stdout.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError(f"pigz failed with exit code {returncode}")
+
+
+def _member_path(target: str, name: str) -> Optional[str]:
+    """Resolve an archive member path, or None if it escapes the target."""
+    root = path.realpath(target)
+    dest = path.realpath(path.join(root, name))
+    if dest != root and not dest.startswith(root + os.sep):
+        logger.warning("Skipping archive member outside target: %s", name)
+        return None
+    return dest
+
+
+def _fadvise(fd: int, advice: str) -> None:
+    """Apply a posix_fadvise hint where the platform supports it."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+    except OSError:
+        pass
@@ -4,24 +4,18 @@ Database helpers for OceanBase image search.
 """
 
 import argparse
+import array
+import json
 import os
 import sys
-
-from dotenv import load_dotenv
-from pydantic import BaseModel
-
-import pyseekdb
-from pyseekdb import Configuration, HNSWConfiguration
+from dataclasses import dataclass
+from typing import Sequence
 
 from .logger import get_logger
 
 # Logger for database helpers
 logger = get_logger(__name__)
 
-# Load environment variables from a .env file if present
-load_dotenv()
-logger.info("Environment variables loaded for DB helpers.")
-
 # Consolidate connection parameters for reuse across modules
 connection_args = {
     "host": os.getenv("DB_HOST", ""),
@@ -34,20 +28,29 @@ connection_args = {
 # Embedding dimension (must match the embedding API output)
 EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1024"))
 
+# Vector index distance metric and the index name pyseekdb gives it
+VECTOR_DISTANCE = "l2"
+_VECTOR_INDEX_NAME = "idx_vec"
+
 # -----------------------------------------------------------------------------
 # Data Models
 # -----------------------------------------------------------------------------
 
 
-class ImageData(BaseModel):
+@dataclass(frozen=True, slots=True, kw_only=True)
+class ImageData:
     """
     Typed container for image file metadata and embeddings.
+
+    A plain slotted dataclass: one is built per ingested image, so it
+    skips per-instance validation and keeps records small.
     """
 
     file_name: str = ""
     file_path: str = ""
     caption: str = ""
-    embedding: list[float]
+    # Ingested rows hold a packed float32 array rather than a list of floats
+    embedding: Sequence[float]
 
 
 def _get_raw_connection(client):
@@ -65,8 +68,236 @@ def _execute_raw_sql(client, sql: str) -> list:
         return cursor.fetchall()
 
 
+def bulk_upsert(
+    client,
+    collection,
+    ids: list[str],
+    embeddings: list[Sequence[float]],
+    metadatas: list[dict],
+    documents: list[str],
+) -> None:
+    """
+    Insert or update rows of a collection with one multi-row statement.
+
+    pyseekdb's ``upsert`` reads and writes each row separately; this sends
+    ``INSERT ... ON DUPLICATE KEY UPDATE`` through the DB-API
+    ``executemany`` fast path, which packs all rows into as few statements
+    as the driver's statement size limit allows.
+    """
+    from pyseekdb.client.meta_info import CollectionFieldNames
+
+    table = _collection_table(collection)
+    id_col = CollectionFieldNames.ID
+    doc_col = CollectionFieldNames.DOCUMENT
+    meta_col = CollectionFieldNames.METADATA
+    vec_col = CollectionFieldNames.EMBEDDING
+    sql = (
+        f"INSERT INTO `{table}` ({id_col}, {doc_col}, {meta_col}, {vec_col}) "
+        "VALUES (%s, %s, %s, %s) "
+        f"ON DUPLICATE KEY UPDATE {doc_col} = VALUES({doc_col}), "
+        f"{meta_col} = VALUES({meta_col}), {vec_col} = VALUES({vec_col})"
+    )
+    rows = [
+        (
+            row_id,
+            document,
+            json.dumps(metadata, ensure_ascii=False),
+            _pack_vector(embedding),
+        )
+        for row_id, embedding, metadata, document in zip(
+            ids, embeddings, metadatas, documents
+        )
+    ]
+    conn = _get_raw_connection(client)
+    with conn.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def fulltext_search(
+    client, collection, query_text: str, limit: int
+) -> list[tuple[dict, str]]:
+    """
+    Full-text search over collection documents, best matches first.
+
+    Returns (metadata, document) pairs. The query text is bound as a
+    parameter rather than spliced into the SQL, so the statement text is
+    identical across searches and the server can reuse its plan.
+    """
+    from pyseekdb.client.meta_info import CollectionFieldNames
+
+    doc_col = CollectionFieldNames.DOCUMENT
+    meta_col = CollectionFieldNames.METADATA
+    match = f"MATCH({doc_col}) AGAINST (%s IN NATURAL LANGUAGE MODE)"
+    sql = (
+        f"SELECT {doc_col}, {meta_col}, {match} AS score "
+        f"FROM `{_collection_table(collection)}` WHERE {match} "
+        "ORDER BY score DESC LIMIT %s"
+    )
+    results = []
+    conn = _get_raw_connection(client)
+    with conn.cursor() as cursor:
+        cursor.execute(sql, (query_text, query_text, limit))
+        # Build results straight from the cursor, no intermediate row list
+        for row in cursor:
+            # The server client returns dict rows, the embedded one tuples
+            document, metadata = (
+                (row[doc_col], row[meta_col]) if isinstance(row, dict) else row[:2]
+            )
+            if isinstance(metadata, (str, bytes)):
+                metadata = json.loads(metadata)
+            results.append((metadata or {}, document or ""))
+    return results
+
+
+def vector_search_within(
+    client,
+    collection,
+    embedding: Sequence[float],
+    limit: int,
+    distance_threshold: float,
+) -> list[tuple[dict, str, float]]:
+    """
+    ANN search returning only neighbours within distance_threshold.
+
+    Returns (metadata, document, distance) tuples, nearest first. The
+    threshold is applied by the server around the same approximate KNN
+    query pyseekdb issues, so rows beyond it are never sent back.
+    """
+    from pyseekdb.client.meta_info import CollectionFieldNames
+
+    doc_col = CollectionFieldNames.DOCUMENT
+    meta_col = CollectionFieldNames.METADATA
+    vec_col = CollectionFieldNames.EMBEDDING
+    # Hex literal of the packed float32 vector, as pyseekdb sends it
+    vector = "X'" + _pack_vector(embedding).hex() + "'"
+    # Collections are created with the l2 metric (see VECTOR_DISTANCE)
+    distance = f"l2_distance({vec_col}, {vector})"
+    sql = (
+        f"SELECT {doc_col}, {meta_col}, distance FROM ("
+        f"SELECT {doc_col}, {meta_col}, {distance} AS distance "
+        f"FROM `{_collection_table(collection)}` "
+        f"ORDER BY {distance} APPROXIMATE LIMIT %s"
+        ") AS knn WHERE distance <= %s ORDER BY distance"
+    )
+    results = []
+    conn = _get_raw_connection(client)
+    with conn.cursor() as cursor:
+        cursor.execute(sql, (limit, distance_threshold))
+        for row in cursor:
+            document, metadata, dist = (
+                (row[doc_col], row[meta_col], row["distance"])
+                if isinstance(row, dict)
+                else row[:3]
+            )
+            if isinstance(metadata, (str, bytes)):
+                metadata = json.loads(metadata)
+            results.append((metadata or {}, document or "", float(dist)))
+    return results
+
+
+def _pack_vector(embedding: Sequence[float]) -> bytes:
+    """
+    Return a vector as packed little-endian float32, the binary form
+    pyseekdb uses for its own inserts.
+
+    float32 arrays are copied out as-is instead of being unboxed per value.
+    """
+    if (
+        sys.byteorder == "little"
+        and isinstance(embedding, array.array)
+        and embedding.typecode == "f"
+    ):
+        return embedding.tobytes()
+    packed = array.array("f", embedding)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def sample_row_id(client, collection) -> str | None:
+    """Return the ID of an arbitrary row of the collection, or None if empty."""
+    from pyseekdb.client.meta_info import CollectionFieldNames
+
+    conn = _get_raw_connection(client)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {CollectionFieldNames.ID} FROM "
+            f"`{_collection_table(collection)}` LIMIT 1"
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    row_id = row[CollectionFieldNames.ID] if isinstance(row, dict) else row[0]
+    if isinstance(row_id, (bytes, bytearray)):
+        row_id = row_id.decode("utf-8", errors="replace")
+    return row_id
+
+
+def is_collection_empty(client, collection) -> bool:
+    """Return True if the collection holds no rows."""
+    conn = _get_raw_connection(client)
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT 1 FROM `{_collection_table(collection)}` LIMIT 1")
+        return cursor.fetchone() is None
+
+
+def has_vector_index(client, collection) -> bool:
+    """Return True if the collection's HNSW vector index exists."""
+    conn = _get_raw_connection(client)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SHOW INDEX FROM `{_collection_table(collection)}` WHERE Key_name = %s",
+            (_VECTOR_INDEX_NAME,),
+        )
+        return cursor.fetchone() is not None
+
+
+def drop_vector_index(client, collection) -> None:
+    """
+    Drop the collection's HNSW vector index.
+
+    Used before bulk-loading an empty collection, so rows are written
+    without updating the graph one by one; see create_vector_index.
+    """
+    table = _collection_table(collection)
+    conn = _get_raw_connection(client)
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP INDEX {_VECTOR_INDEX_NAME} ON `{table}`")
+    logger.info("Dropped vector index on %s for bulk load.", table)
+
+
+def create_vector_index(client, collection) -> None:
+    """Build the collection's HNSW vector index over the rows already loaded."""
+    from pyseekdb.client.meta_info import CollectionFieldNames
+
+    table = _collection_table(collection)
+    # Same definition pyseekdb uses when it creates the collection table
+    sql = (
+        f"CREATE VECTOR INDEX {_VECTOR_INDEX_NAME} ON `{table}` "
+        f"({CollectionFieldNames.EMBEDDING}) "
+        f"WITH (DISTANCE={VECTOR_DISTANCE}, TYPE=hnsw, LIB=vsag)"
+    )
+    conn = _get_raw_connection(client)
+    with conn.cursor() as cursor:
+        cursor.execute(sql)
+    logger.info("Built vector index on %s.", table)
+
+
+def _collection_table(collection) -> str:
+    """Return the SQL table backing a pyseekdb collection."""
+    from pyseekdb.client.meta_info import CollectionNames
+
+    if collection.id:
+        return CollectionNames.table_name_v2(collection.id)
+    return CollectionNames.table_name(collection.name)
+
+
 def build_client():
     """Build a pyseekdb Client in remote server mode."""
+    # pyseekdb pulls in onnxruntime and numpy; import it only when a client
+    # is needed so embedding-only users of this module stay light
+    import pyseekdb
+
     return pyseekdb.Client(
         host=connection_args["host"],
         port=int(connection_args["port"]),
@@ -76,10 +307,37 @@ def build_client():
     )
 
 
+def clone_client(client):
+    """
+    Build a new client with the same connection settings as ``client``.
+
+    Each client owns one pymysql connection, so threads that talk to the
+    database concurrently need a client each.
+    """
+    import pyseekdb
+
+    # _ClientProxy wraps the real client in _server
+    server = getattr(client, "_server", client)
+    if getattr(server, "host", None) is None:
+        raise ValueError("Only remote server mode clients can be cloned")
+    return pyseekdb.Client(
+        host=server.host,
+        port=server.port,
+        tenant=server.tenant,
+        database=server.database,
+        user=server.user,
+        password=server.password,
+        charset=server.charset,
+        **server.kwargs,
+    )
+
+
 def get_or_create_collection(client, collection_name: str):
     """Get or create a collection with HNSW + fulltext config."""
+    from pyseekdb import Configuration, HNSWConfiguration
+
     config = Configuration(
-        hnsw=HNSWConfiguration(dimension=EMBEDDING_DIMENSION, distance="l2"),
+        hnsw=HNSWConfiguration(dimension=EMBEDDING_DIMENSION, distance=VECTOR_DISTANCE),
     )
     return client.get_or_create_collection(
         name=collection_name,
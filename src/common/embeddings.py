@@ -6,12 +6,26 @@ This module provides:
 - ImageScanner: Scans directories for valid image files
 """
 
+import array
+import asyncio
 import base64
+import binascii
+import io
+import itertools
 import os
-import re
+import queue
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
 from http import HTTPStatus
-from typing import Any, FrozenSet, Iterator, Optional, cast
+from typing import IO, Any, FrozenSet, Iterable, Iterator, Optional, TypeVar, Union, cast
 
+from .cache import EmbeddingCache, file_fingerprint, open_cache
 from .db import ImageData
 from .logger import get_logger
 
@@ -22,12 +36,45 @@ from .logger import get_logger
 # Supported image file extensions
 SUPPORTED_IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png"})
 
-# Pattern to filter non-ASCII printable characters in paths
-_NON_ASCII_PATTERN = re.compile(r"[^ -~]")
+# Bytes read per Base64 encoding step; a multiple of 3 so chunks need no padding
+_B64_CHUNK_SIZE = 3 * (1 << 16)
+
+# Images whose longer side exceeds this many pixels are downscaled and
+# re-encoded as JPEG before upload (0 disables)
+_MAX_IMAGE_SIDE = int(os.getenv("EMBEDDING_MAX_IMAGE_SIDE", "1024"))
+_RESIZED_JPEG_QUALITY = 85
+
+# Threads decoding/downscaling/encoding images of a batch; Pillow and
+# binascii release the GIL, so these run in parallel
+_ENCODE_WORKERS = min(8, os.cpu_count() or 1)
+
+# Number of scanned batches buffered ahead of the embedding stage
+_PREFETCH_BATCHES = 4
+
+# Max caption requests in flight (shared across batches and callers)
+_CAPTION_CONCURRENCY = 32
+
+# Instruction sent with every image to the captioning model
+_CAPTION_PROMPT = (
+    "Identify the main object category/type in this image. "
+    "Answer with 1-2 words describing the species or object type only (e.g., 'dog', 'car', 'tree', 'building'). "
+    "Focus on WHAT it is, not how it looks."
+)
+
+# Default location of the local embedding/caption cache
+_DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "data",
+    "tmp",
+    "cache",
+    "embeddings.sqlite3",
+)
 
 # Logger for this module
 _logger = get_logger(__name__)
 
+_T = TypeVar("_T")
+
 
 # -----------------------------------------------------------------------------
 # Embedding Engine
@@ -53,11 +100,27 @@ class EmbeddingEngine:
         )
         self._dimension = int(os.getenv("EMBEDDING_DIMENSION", "1024"))
         self._api_key = os.getenv("EMBEDDING_API_KEY", "")
+        # Optional API endpoint override (e.g. a regional or dedicated deployment)
+        self._base_url = os.getenv("EMBEDDING_BASE_URL", "")
+        # Max images per embedding request (API-side limit)
+        self._batch_limit = max(1, int(os.getenv("EMBEDDING_BATCH_SIZE", "8")))
+        # DashScope MultiModalEmbedding class, resolved and configured once
+        self._mm_embed: Any = None
 
     # -------------------------------------------------------------------------
     # Public API
     # -------------------------------------------------------------------------
 
+    def warmup(self) -> None:
+        """
+        Import and configure the backend SDK ahead of the first request.
+        """
+        if self._type == "dashscope":
+            self._dashscope_api()
+            _logger.info("DashScope embedding backend warmed up.")
+        else:
+            raise ValueError(f"Unsupported EMBEDDING_TYPE: {self._type}")
+
     def embed(self, image_path: str) -> list[float]:
         """
         Generate an embedding vector for the given image file.
@@ -68,8 +131,65 @@ class EmbeddingEngine:
         Returns:
             A list of floats representing the image embedding.
         """
+        return self.embed_batch([image_path])[0]
+
+    def embed_batch(self, image_paths: list[str]) -> list[list[float]]:
+        """
+        Generate embedding vectors for several image files at once.
+
+        Args:
+            image_paths: Paths to the image files.
+
+        Returns:
+            One embedding per input path, in the same order.
+        """
+        if not image_paths:
+            return []
+        data_uris = _encode_images(image_paths)
+        return self.embed_data_uris(data_uris, image_paths[0])
+
+    def embed_data_uris(
+        self, data_uris: list[str], source: str = "<in-memory image>"
+    ) -> list[list[float]]:
+        """
+        Generate embedding vectors for images already encoded as data URIs.
+
+        Images are sent to the backend in groups of at most
+        EMBEDDING_BATCH_SIZE per request, so a batch costs one round-trip
+        per group instead of one per image.
+
+        Args:
+            data_uris: Base64 image data URIs (see ``encode_image``).
+            source: Label for log messages, e.g. the first file path.
+
+        Returns:
+            One embedding per input, in the same order.
+        """
+        if not data_uris:
+            return []
         if self._type == "dashscope":
-            return self._embed_image_dashscope(image_path)
+            embeddings: list[list[float]] = []
+            for start in range(0, len(data_uris), self._batch_limit):
+                chunk = data_uris[start : start + self._batch_limit]
+                embeddings.extend(self._embed_images_dashscope(chunk, source))
+            return embeddings
+        else:
+            raise ValueError(f"Unsupported EMBEDDING_TYPE: {self._type}")
+
+    def embed_bytes(self, content: bytes, image_format: str = "jpeg") -> list[float]:
+        """
+        Generate an embedding vector for encoded image bytes held in memory.
+
+        Args:
+            content: Encoded image bytes (e.g. JPEG or PNG file content).
+            image_format: Image format or file extension, e.g. "png" or ".jpg".
+
+        Returns:
+            A list of floats representing the image embedding.
+        """
+        if self._type == "dashscope":
+            data_uri = self._bytes_to_data_uri(content, image_format)
+            return self._embed_images_dashscope([data_uri], "<in-memory image>")[0]
         else:
             raise ValueError(f"Unsupported EMBEDDING_TYPE: {self._type}")
 
@@ -92,73 +212,100 @@ class EmbeddingEngine:
     # DashScope Backend
     # -------------------------------------------------------------------------
 
-    _MAX_RETRIES = 3
-    _RETRY_BACKOFF = 2  # seconds; doubles each retry
+    _MAX_RETRIES = 5
+    _RETRY_BACKOFF = 1  # seconds; doubles each retry, plus up to 1s jitter
+    # Throttling and transient server errors; other failures are not retried
+    _RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
 
-    def _embed_image_dashscope(self, image_path: str) -> list[float]:
-        """Generate image embedding via DashScope Multimodal-Embedding API."""
-        import time
-
-        import dashscope
-        from dashscope import MultiModalEmbedding
+    def _dashscope_api(self) -> Any:
+        """
+        Return the DashScope MultiModalEmbedding API, configuring the SDK on
+        first use so later calls skip the import and global setup.
+        """
+        if self._mm_embed is None:
+            import dashscope
+            from dashscope import MultiModalEmbedding
+
+            dashscope.api_key = self._api_key
+            if self._base_url:
+                dashscope.base_http_api_url = self._base_url
+            self._mm_embed = MultiModalEmbedding
+        return self._mm_embed
+
+    def _embed_images_dashscope(
+        self, data_uris: list[str], source: str
+    ) -> list[list[float]]:
+        """
+        Generate image embeddings via DashScope Multimodal-Embedding API.
 
-        dashscope.api_key = self._api_key
+        ``source`` only labels the request in logs (e.g. the first file path).
+        """
+        import random
+        import time
 
-        b64_image = self._image_to_base64(image_path)
-        ext = os.path.splitext(image_path)[1].lstrip(".").lower()
-        if ext == "jpg":
-            ext = "jpeg"
-        data_uri = f"data:image/{ext};base64,{b64_image}"
+        mm_embed = self._dashscope_api()
+        image_input = cast(Any, [{"image": uri} for uri in data_uris])
 
         last_error = None
         for attempt in range(1, self._MAX_RETRIES + 1):
             _logger.info(
-                "Generating image embedding via DashScope (attempt %d/%d): %s",
+                "Generating %d image embedding(s) via DashScope (attempt %d/%d): %s",
+                len(data_uris),
                 attempt,
                 self._MAX_RETRIES,
-                image_path,
-            )
-            image_input = cast(Any, [{"image": data_uri}])
-            resp = MultiModalEmbedding.call(
-                model=self._model,
-                input=image_input,
-                dimension=self._dimension,
+                source,
             )
-
-            if resp.status_code == HTTPStatus.OK:
-                embedding = resp.output["embeddings"][0]["embedding"]
+            try:
+                resp = mm_embed.call(
+                    model=self._model,
+                    input=image_input,
+                    dimension=self._dimension,
+                )
+            except OSError as e:
+                # Connection resets and timeouts (requests errors are OSErrors)
+                resp = None
+                error_msg = str(e)
+            else:
+                error_msg = getattr(resp, "message", str(resp))
+
+            if resp is not None and resp.status_code == HTTPStatus.OK:
+                # Items carry their input position; don't rely on response order
+                items = sorted(resp.output["embeddings"], key=lambda item: item["index"])
+                if len(items) != len(data_uris):
+                    raise RuntimeError(
+                        f"DashScope returned {len(items)} embeddings for {len(data_uris)} images"
+                    )
+                embeddings = [item["embedding"] for item in items]
                 _logger.info(
-                    "Generated image embedding (%d dims) for %s",
-                    len(embedding),
-                    image_path,
+                    "Generated %d image embedding(s) (%d dims)",
+                    len(embeddings),
+                    len(embeddings[0]) if embeddings else 0,
                 )
-                return embedding
+                return embeddings
 
-            error_msg = getattr(resp, "message", str(resp))
             last_error = error_msg
             _logger.warning(
                 "DashScope embedding attempt %d failed: %s",
                 attempt,
                 error_msg,
             )
+            if resp is not None and resp.status_code not in self._RETRYABLE_STATUS:
+                break
             if attempt < self._MAX_RETRIES:
-                wait = self._RETRY_BACKOFF * (2 ** (attempt - 1))
-                _logger.info("Retrying in %ds...", wait)
+                wait = self._RETRY_BACKOFF * (2 ** (attempt - 1)) + random.uniform(0, 1)
+                _logger.info("Retrying in %.1fs...", wait)
                 time.sleep(wait)
 
-        _logger.error("DashScope embedding failed after %d attempts: %s", self._MAX_RETRIES, last_error)
-        raise RuntimeError(f"DashScope embedding failed after {self._MAX_RETRIES} attempts: {last_error}")
+        _logger.error("DashScope embedding failed after %d attempt(s): %s", attempt, last_error)
+        raise RuntimeError(f"DashScope embedding failed after {attempt} attempt(s): {last_error}")
 
     def _embed_text_dashscope(self, text: str) -> list[float]:
         """Generate text embedding via DashScope Multimodal-Embedding API."""
-        import dashscope
-        from dashscope import MultiModalEmbedding
-
-        dashscope.api_key = self._api_key
+        mm_embed = self._dashscope_api()
 
         _logger.info("Generating text embedding via DashScope: %s", text[:50])
         text_input = cast(Any, [{"text": text}])
-        resp = MultiModalEmbedding.call(
+        resp = mm_embed.call(
             model=self._model,
             input=text_input,
             dimension=self._dimension,
@@ -177,11 +324,84 @@ class EmbeddingEngine:
     # Helpers
     # -------------------------------------------------------------------------
 
-    @staticmethod
-    def _image_to_base64(image_path: str) -> str:
-        """Read image file and return Base64-encoded string."""
+    @classmethod
+    def _image_to_data_uri(cls, image_path: str) -> str:
+        """
+        Read image file and return it as a Base64 data URI.
+
+        The file is encoded in chunks straight into a buffer sized for the
+        final URI, so neither the raw file nor a separate Base64 copy is
+        held in memory alongside the result. Oversized images are
+        downscaled first (see ``EMBEDDING_MAX_IMAGE_SIDE``).
+        """
+        resized = cls._downscale(image_path)
+        if resized is not None:
+            return cls._bytes_to_data_uri(resized, "jpeg")
+
+        prefix = cls._data_uri_prefix(os.path.splitext(image_path)[1])
         with open(image_path, "rb") as f:
-            return base64.b64encode(f.read()).decode("utf-8")
+            size = os.fstat(f.fileno()).st_size
+            buf = bytearray(len(prefix) + 4 * ((size + 2) // 3))
+            buf[: len(prefix)] = prefix
+            pos = len(prefix)
+            while chunk := f.read(_B64_CHUNK_SIZE):
+                encoded = binascii.b2a_base64(chunk, newline=False)
+                buf[pos : pos + len(encoded)] = encoded
+                pos += len(encoded)
+        # Trim in case the file shrank after fstat()
+        del buf[pos:]
+        return buf.decode("ascii")
+
+    @classmethod
+    def _bytes_to_data_uri(cls, content: bytes, image_format: str) -> str:
+        """Return encoded image bytes as a Base64 data URI."""
+        resized = cls._downscale(io.BytesIO(content))
+        if resized is not None:
+            content, image_format = resized, "jpeg"
+        return (cls._data_uri_prefix(image_format) + base64.b64encode(content)).decode("ascii")
+
+    @staticmethod
+    def _downscale(source: Union[str, IO[bytes]]) -> Optional[bytes]:
+        """
+        Return the image re-encoded as a JPEG no larger than _MAX_IMAGE_SIDE,
+        or None if it is already small enough (or can't be decoded here).
+
+        The embedding and caption models work at far lower resolutions than
+        camera photos, so shrinking large inputs cuts upload size without
+        changing what the models see.
+        """
+        if _MAX_IMAGE_SIDE <= 0:
+            return None
+        from PIL import Image, ImageOps
+
+        try:
+            with Image.open(source) as img:
+                # Only the header has been read so far
+                if max(img.size) <= _MAX_IMAGE_SIDE:
+                    return None
+                # Let the JPEG decoder skip detail we'd throw away anyway
+                img.draft("RGB", (_MAX_IMAGE_SIDE, _MAX_IMAGE_SIDE))
+                img = ImageOps.exif_transpose(img)
+                # convert() always copies, so skip it for the common RGB/L
+                # JPEG case; palette/alpha/CMYK inputs need RGB for JPEG
+                # output and palette images only resample nearest-neighbour
+                if img.mode not in ("RGB", "L"):
+                    img = img.convert("RGB")
+                img.thumbnail((_MAX_IMAGE_SIDE, _MAX_IMAGE_SIDE))
+                out = io.BytesIO()
+                img.save(out, format="JPEG", quality=_RESIZED_JPEG_QUALITY)
+                return out.getvalue()
+        except (OSError, ValueError) as e:
+            # Send the original bytes and let the API decide
+            _logger.warning("Failed to downscale image, sending as-is: %s", e)
+            return None
+
+    @staticmethod
+    def _data_uri_prefix(image_format: str) -> bytes:
+        ext = image_format.lstrip(".").lower()
+        if ext == "jpg":
+            ext = "jpeg"
+        return f"data:image/{ext};base64,".encode("ascii")
 
 
 # -----------------------------------------------------------------------------
@@ -213,6 +433,8 @@ class ImageScanner:
     ):
         self._directory = directory
         self._extensions = extensions
+        # str.endswith accepts a tuple, checked in a single C-level call
+        self._ext_tails = tuple(ext.lower() for ext in extensions)
 
     def count(self) -> int:
         """Count the number of valid image files in the directory."""
@@ -222,25 +444,47 @@ class ImageScanner:
 
     def scan(self) -> Iterator[str]:
         """Yield absolute paths to valid image files."""
-        for root, _, files in os.walk(self._directory):
-            if not self._is_valid_directory(root):
-                continue
-            for filename in files:
-                if self._is_valid_image_file(filename):
-                    yield os.path.abspath(os.path.join(root, filename))
+        yield from self._scan_dir(os.path.abspath(self._directory))
+
+    def scan_list(self) -> list[str]:
+        """
+        Return absolute paths to valid image files as a list.
+
+        Use when both the count and the paths are needed, e.g. a progress
+        total followed by loading; ``scan`` streams without materializing.
+        """
+        return list(self.scan())
+
+    def _scan_dir(self, path: str) -> Iterator[str]:
+        # Directory validity only depends on the path, check it once per dir
+        if not self._is_valid_directory(path):
+            return
+        subdirs: list[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    # DirEntry caches the file type, no extra stat() needed
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    # Name check first; is_file() is answered from the cached
+                    # d_type and only stats symlinks
+                    elif self._is_valid_image_file(entry.name) and entry.is_file():
+                        yield entry.path
+        except OSError as e:
+            _logger.warning("Failed to scan directory %s: %s", path, e)
+            return
+        for subdir in subdirs:
+            yield from self._scan_dir(subdir)
 
     def _is_valid_directory(self, path: str) -> bool:
-        if "MACOSX" in path:
-            return False
-        if _NON_ASCII_PATTERN.match(path):
-            return False
-        return True
+        # A rejected directory prunes its whole subtree, so only the last
+        # component needs the macOS metadata check
+        return os.path.basename(path) != "__MACOSX" and path.isascii()
 
     def _is_valid_image_file(self, filename: str) -> bool:
-        if filename.startswith("."):
+        if filename.startswith(".") or not filename.isascii():
             return False
-        ext = os.path.splitext(filename)[1].lower()
-        return ext in self._extensions
+        return filename.lower().endswith(self._ext_tails)
 
 
 # -----------------------------------------------------------------------------
@@ -248,6 +492,16 @@ class ImageScanner:
 # -----------------------------------------------------------------------------
 
 _default_engine: Optional[EmbeddingEngine] = None
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_loaded = False
+_default_cache_lock = threading.Lock()
+_encode_executor: Optional[ThreadPoolExecutor] = None
+_encode_executor_lock = threading.Lock()
+_caption_loop: Optional[asyncio.AbstractEventLoop] = None
+_caption_loop_lock = threading.Lock()
+_caption_semaphore = asyncio.Semaphore(_CAPTION_CONCURRENCY)
+# Only touched from the caption loop thread
+_async_openai_client: Any = None
 
 
 def _get_default_engine() -> EmbeddingEngine:
@@ -258,6 +512,80 @@ def _get_default_engine() -> EmbeddingEngine:
     return _default_engine
 
 
+def _get_default_cache() -> Optional[EmbeddingCache]:
+    """Get the local embedding cache, or None if EMBEDDING_CACHE_PATH is empty."""
+    global _default_cache, _default_cache_loaded
+    with _default_cache_lock:
+        if not _default_cache_loaded:
+            _default_cache = open_cache(
+                os.getenv("EMBEDDING_CACHE_PATH", _DEFAULT_CACHE_PATH)
+            )
+            _default_cache_loaded = True
+    return _default_cache
+
+
+def _get_encode_executor() -> ThreadPoolExecutor:
+    """Get or create the thread pool used to encode images in parallel."""
+    global _encode_executor
+    with _encode_executor_lock:
+        if _encode_executor is None:
+            _encode_executor = ThreadPoolExecutor(
+                max_workers=_ENCODE_WORKERS, thread_name_prefix="image-encode"
+            )
+    return _encode_executor
+
+
+def _get_caption_loop() -> asyncio.AbstractEventLoop:
+    """
+    Get or start the event loop that runs caption requests.
+
+    All caption calls share one background thread; concurrency comes from
+    asyncio rather than one OS thread per in-flight request.
+    """
+    global _caption_loop
+    with _caption_loop_lock:
+        if _caption_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="image-caption", daemon=True
+            ).start()
+            _caption_loop = loop
+    return _caption_loop
+
+
+def _get_async_openai_client() -> Any:
+    """
+    Get or create the shared async OpenAI-compatible client used for captions.
+
+    Reusing the client keeps its connection pool warm, avoiding a TLS
+    handshake per caption request.
+    """
+    global _async_openai_client
+    if _async_openai_client is None:
+        import httpx
+        import openai
+
+        _async_openai_client = openai.AsyncOpenAI(
+            api_key=os.getenv("VLM_API_KEY"),
+            base_url=os.getenv(
+                "VLM_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1"
+            ),
+            # Keep a warm connection for every concurrent caption request
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=_CAPTION_CONCURRENCY,
+                    max_keepalive_connections=_CAPTION_CONCURRENCY,
+                )
+            ),
+        )
+    return _async_openai_client
+
+
+def warmup() -> None:
+    """Initialize the default embedding engine and its backend SDK."""
+    _get_default_engine().warmup()
+
+
 def embed_img(path: str) -> list[float]:
     """
     Generate an embedding vector for the given image file.
@@ -271,6 +599,20 @@ def embed_img(path: str) -> list[float]:
     return _get_default_engine().embed(path)
 
 
+def embed_img_bytes(content: bytes, image_format: str = "jpeg") -> list[float]:
+    """
+    Generate an embedding vector for encoded image bytes held in memory.
+
+    Args:
+        content: Encoded image bytes (e.g. JPEG or PNG file content).
+        image_format: Image format or file extension, e.g. "png" or ".jpg".
+
+    Returns:
+        A list of floats representing the image embedding.
+    """
+    return _get_default_engine().embed_bytes(content, image_format)
+
+
 def embed_text(text: str) -> list[float]:
     """
     Generate an embedding vector for the given text.
@@ -284,6 +626,35 @@ def embed_text(text: str) -> list[float]:
     return _get_default_engine().embed_text(text)
 
 
+def encode_image(path: str) -> str:
+    """
+    Read an image file and return it as a Base64 data URI.
+
+    The result can be passed to both ``EmbeddingEngine.embed_data_uris`` and
+    ``caption_data_uri`` so the file is read and encoded only once.
+    """
+    return EmbeddingEngine._image_to_data_uri(path)
+
+
+def _encode_images(paths: list[str]) -> list[str]:
+    """Encode several image files as data URIs in parallel, keeping order."""
+    if len(paths) <= 1:
+        return [encode_image(p) for p in paths]
+    return list(_get_encode_executor().map(encode_image, paths))
+
+
+class PlaceholderCaption(str):
+    """
+    Caption text returned in place of a real caption (missing VLM key,
+    failed or empty response). It is still shown to users, but never cached.
+    """
+
+
+def is_placeholder_caption(caption: str) -> bool:
+    """Return whether a caption stands in for one that wasn't generated."""
+    return isinstance(caption, PlaceholderCaption)
+
+
 def caption_img(path: str) -> str:
     """
     Generate image caption using OpenAI-compatible API (Qwen/OpenAI/Azure etc).
@@ -294,50 +665,90 @@ def caption_img(path: str) -> str:
     Returns:
         A text description of the image, or error message if generation fails.
     """
-    api_key = os.getenv("VLM_API_KEY")
-    base_url = os.getenv(
-        "VLM_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1"
+    if not os.getenv("VLM_API_KEY"):
+        return PlaceholderCaption(
+            "[Warning: VLM_API_KEY not set, fall back to vector-only mode]"
+        )
+
+    try:
+        data_uri = encode_image(path)
+    except OSError as e:
+        _logger.error("Failed to generate caption for %s: %s", path, e)
+        return PlaceholderCaption(f"[Error: {str(e)}]")
+    return caption_data_uri(data_uri, path)
+
+
+def caption_data_uri(data_uri: str, source: str = "<in-memory image>") -> str:
+    """
+    Generate image caption for an image already encoded as a data URI.
+
+    Args:
+        data_uri: Base64 image data URI (see ``encode_image``).
+        source: Label for log messages, e.g. the file path.
+
+    Returns:
+        A text description of the image, or error message if generation fails.
+    """
+    return submit_caption(data_uri, source).result()
+
+
+def submit_caption(data_uri: str, source: str = "<in-memory image>") -> Future[str]:
+    """
+    Schedule a caption request without waiting for it.
+
+    Returns a future resolving to the same value as ``caption_data_uri``.
+    Many requests can be in flight at once, up to the caption concurrency.
+    """
+    return asyncio.run_coroutine_threadsafe(
+        _caption_data_uri_async(data_uri, source), _get_caption_loop()
     )
-    model = os.getenv("MODEL", "qwen-vl-max")
 
-    if not api_key:
-        return "[Warning: VLM_API_KEY not set, fall back to vector-only mode]"
 
-    try:
-        with open(path, "rb") as f:
-            b64_image = base64.b64encode(f.read()).decode("utf-8")
+async def _caption_data_uri_async(data_uri: str, source: str) -> str:
+    model = os.getenv("MODEL", "qwen-vl-max")
 
-        import openai
-        client = openai.OpenAI(api_key=api_key, base_url=base_url)
-
-        response = client.chat.completions.create(
-            model=model,
-            messages=[{
-                "role": "user",
-                "content": [
-                    {
-                        "type": "text",
-                        "text": (
-                            "Identify the main object category/type in this image. "
-                            "Answer with 1-2 words describing the species or object type only (e.g., 'dog', 'car', 'tree', 'building'). "
-                            "Focus on WHAT it is, not how it looks."
-                        ),
-                    },
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{b64_image}"}}
-                ]
-            }],
-            temperature=0.1,
+    if not os.getenv("VLM_API_KEY"):
+        return PlaceholderCaption(
+            "[Warning: VLM_API_KEY not set, fall back to vector-only mode]"
         )
-        content = response.choices[0].message.content
-        if content is None:
-            _logger.warning("No caption generated for %s", path)
-            return "[No caption]"
-        caption = content.strip()
-        _logger.info("Generated caption for %s: %s", path, caption)
-        return caption
-    except Exception as e:
-        _logger.error("Failed to generate caption for %s: %s", path, e)
-        return f"[Error: {str(e)}]"
+
+    async with _caption_semaphore:
+        try:
+            client = _get_async_openai_client()
+
+            response = await client.chat.completions.create(
+                model=model,
+                messages=[{
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": _CAPTION_PROMPT},
+                        {"type": "image_url", "image_url": {"url": data_uri}}
+                    ]
+                }],
+                temperature=0.1,
+            )
+            content = response.choices[0].message.content
+            if content is None:
+                _logger.warning("No caption generated for %s", source)
+                return PlaceholderCaption("[No caption]")
+            caption = content.strip()
+            _logger.info("Generated caption for %s: %s", source, caption)
+            return caption
+        except Exception as e:
+            _logger.error("Failed to generate caption for %s: %s", source, e)
+            return PlaceholderCaption(f"[Error: {str(e)}]")
+
+
+def enumerate_images(dir_path: str) -> list[str]:
+    """
+    Return absolute paths of all valid image files under the directory.
+
+    Walk once and reuse the list when both the count and the paths are
+    needed (e.g. progress reporting followed by loading).
+    """
+    paths = ImageScanner(dir_path).scan_list()
+    _logger.info("Enumerated %d images in %s", len(paths), dir_path)
+    return paths
 
 
 def load_amount(dir_path: str) -> int:
@@ -345,17 +756,218 @@ def load_amount(dir_path: str) -> int:
     return ImageScanner(dir_path).count()
 
 
-def load_imgs(dir_path: str) -> Iterator[ImageData]:
-    """Yield ImageData objects for each valid image in the directory."""
+def load_imgs(
+    dir_path: str,
+    batch_size: int = 32,
+    paths: Optional[Iterable[str]] = None,
+    workers: int = 1,
+) -> Iterator[ImageData]:
+    """
+    Yield ImageData objects for each valid image in the directory.
+
+    The directory is scanned on a background thread that feeds batches of
+    ``batch_size`` paths through a bounded queue, so walking the tree
+    overlaps with the embedding requests of earlier batches. Pass ``paths``
+    to reuse the result of an earlier scan instead of walking again.
+
+    With ``workers`` > 1, up to that many batches are embedded and
+    captioned concurrently on a thread pool. Batches are yielded as they
+    complete, not in scan order, so one slow or retrying batch doesn't
+    hold back the others.
+    """
     engine = _get_default_engine()
-    scanner = ImageScanner(dir_path)
+    if paths is None:
+        paths = ImageScanner(dir_path).scan()
+
+    batches = _prefetch(_batch_paths(paths, batch_size), _PREFETCH_BATCHES)
+    if workers <= 1:
+        for batch in batches:
+            yield from _build_image_data(engine, batch)
+        return
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image-embed")
+    pending: set[Future[list[ImageData]]] = set()
+    try:
+        for batch in batches:
+            pending.add(executor.submit(_process_batch, engine, batch))
+            # Bound in-flight work to one batch per worker
+            if len(pending) >= workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in as_completed(pending):
+            yield from future.result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _batch_paths(paths: Iterable[str], batch_size: int) -> Iterator[list[str]]:
+    """Group paths into lists of at most batch_size items."""
+    it = iter(paths)
+    while batch := list(itertools.islice(it, batch_size)):
+        yield batch
+
+
+def _prefetch(items: Iterator[_T], maxsize: int) -> Iterator[_T]:
+    """
+    Drain an iterator on a background thread and yield its items.
+
+    At most ``maxsize`` items are buffered, which bounds memory when the
+    consumer is slower than the producer. Errors raised by the producer are
+    re-raised in the consumer; closing the generator stops the producer.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def _put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            for item in items:
+                if not _put((item, None)):
+                    return
+        except Exception as e:
+            _put((None, e))
+            return
+        # Sentinel: producer finished
+        _put(None)
+
+    threading.Thread(target=_produce, name="image-prefetch", daemon=True).start()
+    try:
+        while (entry := buffer.get()) is not None:
+            item, error = entry
+            if error is not None:
+                raise error
+            yield item
+    finally:
+        stop.set()
+
+
+def _process_batch(engine: EmbeddingEngine, paths: list[str]) -> list[ImageData]:
+    """Embed and caption a batch of images eagerly (for worker threads)."""
+    return list(_build_image_data(engine, paths))
+
+
+def _build_image_data(
+    engine: EmbeddingEngine, paths: list[str]
+) -> Iterator[ImageData]:
+    """
+    Embed a batch of images and pair each embedding with its caption.
+
+    Unchanged files found in the local cache skip both API calls. Entries
+    cached without a caption (e.g. loaded in vector-only mode) reuse the
+    embedding and only retry the caption.
+    """
+    cache = _get_default_cache()
+    if cache is None:
+        yield from _embed_and_caption(engine, paths)
+        return
+
+    namespace = _cache_namespace(engine)
+    keys = [file_fingerprint(p, namespace) for p in paths]
+    hits = cache.get_many(keys)
+    misses = [p for p, key in zip(paths, keys) if key not in hits]
+    if hits:
+        _logger.info("Embedding cache hit for %d/%d images", len(hits), len(paths))
+    uncaptioned = [p for p, key in zip(paths, keys) if key in hits and not hits[key][1]]
+
+    computed = {data.file_path: data for data in _embed_and_caption(engine, misses)}
+    recaptioned = dict(zip(uncaptioned, _caption_paths(uncaptioned)))
+    # Embeddings are always cached; placeholder captions (missing VLM key,
+    # failed request) are stored empty so only the caption is retried
+    cache.put_many(
+        [
+            (key, computed[p].embedding, _cacheable_caption(computed[p].caption))
+            for p, key in zip(paths, keys)
+            if p in computed
+        ]
+        + [
+            (key, hits[key][0], recaptioned[p])
+            for p, key in zip(paths, keys)
+            if p in recaptioned and _cacheable_caption(recaptioned[p])
+        ]
+    )
+
+    for file_path, key in zip(paths, keys):
+        if file_path in computed:
+            yield computed[file_path]
+        else:
+            embedding, caption = hits[key]
+            yield ImageData(
+                file_name=os.path.basename(file_path),
+                file_path=file_path,
+                caption=recaptioned.get(file_path, caption),
+                embedding=embedding,
+            )
+
+
+def _cacheable_caption(caption: str) -> str:
+    """Return the caption to cache: placeholders become ""."""
+    return "" if is_placeholder_caption(caption) else caption
+
+
+def _caption_paths(paths: list[str]) -> list[str]:
+    """Caption several image files concurrently, in the same order."""
+    if not paths:
+        return []
+    if not os.getenv("VLM_API_KEY"):
+        # Same placeholder as caption_img, without reading the files
+        return [caption_img(paths[0])] * len(paths)
+    futures = [
+        submit_caption(data_uri, file_path)
+        for file_path, data_uri in zip(paths, _encode_images(paths))
+    ]
+    return [future.result() for future in futures]
+
+
+def _cache_namespace(engine: EmbeddingEngine) -> bytes:
+    """Settings that change embeddings or captions, mixed into cache keys."""
+    return "|".join(
+        (
+            engine._type,
+            engine._model,
+            str(engine._dimension),
+            os.getenv("MODEL", "qwen-vl-max"),
+            str(_MAX_IMAGE_SIDE),
+        )
+    ).encode("utf-8")
+
+
+def _embed_and_caption(
+    engine: EmbeddingEngine, paths: list[str]
+) -> Iterator[ImageData]:
+    """Call the embedding and caption APIs for a batch of images."""
+    if not paths:
+        return
+    # Read and encode each file once; embedding and captioning share it
+    data_uris = _encode_images(paths)
+
+    # Caption requests are independent network calls: run them concurrently,
+    # overlapping with the batch embedding request
+    captions = [
+        submit_caption(data_uri, file_path)
+        for file_path, data_uri in zip(paths, data_uris)
+    ]
+    try:
+        embeddings = engine.embed_data_uris(data_uris, paths[0])
+    except Exception:
+        for future in captions:
+            future.cancel()
+        raise
 
-    for file_path in scanner.scan():
-        embedding = engine.embed(file_path)
-        caption = caption_img(file_path)
+    for file_path, caption, embedding in zip(paths, captions, embeddings):
         yield ImageData(
             file_name=os.path.basename(file_path),
             file_path=file_path,
-            caption=caption,
-            embedding=embedding,
+            caption=caption.result(),
+            # Packed float32: a quarter of the memory of boxed floats while
+            # the row waits in the insert batch, and copied as-is on upsert
+            embedding=array.array("f", embedding),
         )
@@ -2,34 +2,122 @@
 OceanBase image vector store wrapper (pyseekdb).
 """
 
+import functools
+import hashlib
 import os
-from typing import Any, Iterable, Iterator, Optional
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import chain, repeat
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
 
 from tqdm import tqdm
 
 from .db import (
     ImageData,
+    bulk_upsert,
+    clone_client,
+    create_vector_index,
+    drop_vector_index,
+    fulltext_search,
     get_or_create_collection,
+    has_vector_index,
+    is_collection_empty,
+    sample_row_id,
+    vector_search_within,
+)
+from .embeddings import (
+    caption_img,
+    embed_img,
+    enumerate_images,
+    is_placeholder_caption,
+    load_imgs,
+    load_amount,
+    warmup,
 )
-from .embeddings import embed_img, load_imgs, load_amount
 from .logger import get_logger
 
 # Logger for image store operations
 logger = get_logger(__name__)
 
-# Separator for building composite IDs from file_name + file_path
-_ID_SEP = "|"
 
+def _make_image_id(file_path: str) -> str:
+    """
+    Build a fixed-size row ID from the image path.
+
+    file_name and file_path are kept in metadata, so the ID only needs to
+    be stable and unique per path.
+    """
+    return hashlib.blake2b(file_path.encode("utf-8"), digest_size=16).hexdigest()
 
-def _make_composite_id(file_name: str, file_path: str) -> str:
-    """Build a single string ID from the composite primary key."""
-    return f"{file_name}{_ID_SEP}{file_path}"
 
+def _is_legacy_image_id(row_id: str) -> bool:
+    """Return True for IDs of the older "{file_name}|{file_path}" scheme."""
+    return "|" in row_id
 
-def _split_composite_id(composite_id: str) -> tuple[str, str]:
-    """Recover file_name and file_path from a composite ID."""
-    parts = composite_id.split(_ID_SEP, 1)
-    return parts[0], parts[1] if len(parts) > 1 else ""
+
+def _first(results: dict[str, Any], key: str) -> list:
+    """Return the first query's column from a pyseekdb result, or []."""
+    column = results.get(key)
+    return column[0] if column else []
+
+
+def _poll(
+    items: Iterable[ImageData], timeout: Callable[[], Optional[float]]
+) -> Iterator[Optional[ImageData]]:
+    """
+    Drain an iterator on a background thread, yielding None whenever
+    ``timeout()`` seconds pass without a new item (None waits forever).
+
+    Lets a consumer act on elapsed time while the source is stalled.
+    Errors raised by the source are re-raised here; closing the generator
+    stops the source.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=64)
+    stop = threading.Event()
+
+    def _put(entry) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        try:
+            for item in items:
+                if not _put((item, None)):
+                    return
+        except Exception as e:
+            _put((None, e))
+            return
+        finally:
+            close = getattr(items, "close", None)
+            if close is not None:
+                close()
+        # Sentinel: source exhausted
+        _put(None)
+
+    threading.Thread(target=_produce, name="image-rows", daemon=True).start()
+    try:
+        while True:
+            try:
+                entry = buffer.get(timeout=timeout())
+            except queue.Empty:
+                yield None
+                continue
+            if entry is None:
+                return
+            item, error = entry
+            if error is not None:
+                raise error
+            yield item
+    finally:
+        stop.set()
 
 
 class OBImageStore:
@@ -38,17 +126,55 @@ class OBImageStore:
     """
 
     _DEFAULT_TABLE_NAME = "image_search"
-    _DEFAULT_BATCH_SIZE = 320
+    # Rows per insert statement batch; at 1024 dims a row is ~4 KB of vector
+    # plus metadata, so a batch stays a few MB
+    _DEFAULT_BATCH_SIZE = 1000
+    # Embedding/caption batches in flight during ingest; the work is API-bound,
+    # so a few concurrent batches hide request latency
+    _DEFAULT_WORKERS = 4
+    # Seconds a partial batch may wait for more rows before it is written
+    _DEFAULT_FLUSH_INTERVAL = 5.0
+    # Ingest progress is logged once per this many batches; per-batch
+    # messages are DEBUG only
+    _LOG_EVERY_N_BATCHES = 10
+    # Batches written concurrently during ingest, each on its own connection
+    _WRITE_CONCURRENCY = 4
+    # Images per embedding batch; kept smaller than the insert batch so
+    # concurrent workers don't each hold hundreds of encoded images
+    _EMBED_BATCH_SIZE = 32
+    # Query images whose embedding/caption are remembered between searches
+    _QUERY_CACHE_SIZE = 256
 
     def __init__(
         self,
         client,
         table_name: str = _DEFAULT_TABLE_NAME,
+        client_factory: Optional[Callable[[], Any]] = None,
     ):
+        """
+        ``client_factory`` builds the extra clients used for concurrent
+        ingest writes; by default they copy ``client``'s connection settings.
+        """
         self.client = client
         self.table_name = table_name
+        self._client_factory = client_factory or functools.partial(clone_client, client)
         # Cache for Collection objects keyed by name
         self._collections: dict[str, Any] = {}
+        # Collection names confirmed to exist by has_table
+        self._known_tables: set[str] = set()
+        # Collections whose row IDs were checked against the current scheme
+        self._id_checked: set[str] = set()
+        # Query image embeddings/captions keyed by a digest of the file content
+        self._query_embeddings: OrderedDict[bytes, list[float]] = OrderedDict()
+        self._query_captions: OrderedDict[bytes, str] = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        # Idle connections for concurrent ingest writes, reused across loads
+        self._write_clients: queue.SimpleQueue = queue.SimpleQueue()
+        # Runs the caption request alongside the embedding in hybrid search
+        # (threads are only started on first use)
+        self._query_executor = ThreadPoolExecutor(
+            max_workers=4, thread_name_prefix="image-query"
+        )
 
     def _get_collection(self, collection_name: str):
         """Get or create a collection, with local caching."""
@@ -58,49 +184,166 @@ class OBImageStore:
             )
         return self._collections[collection_name]
 
+    def has_table(self, table_name: Optional[str] = None) -> bool:
+        """
+        Return whether the collection exists, remembering positive answers.
+
+        Collections are never dropped by this app, so once a collection is
+        known to exist (opened here, or seen by an earlier check) no further
+        round-trip is needed. Missing collections are re-checked each call
+        so one created elsewhere is picked up.
+        """
+        table_name = table_name or self.table_name
+        if table_name in self._collections or table_name in self._known_tables:
+            return True
+        exists = self.client.has_collection(table_name)
+        if exists:
+            self._known_tables.add(table_name)
+        return exists
+
+    def warmup(self, table_name: Optional[str] = None) -> None:
+        """
+        Open the collection and load the embedding backend ahead of use.
+
+        Lets a long-running service pay the SDK import and collection lookup
+        at startup instead of on its first search. A missing vector index is
+        only reported: a deferred bulk load may still be running elsewhere.
+        """
+        table_name = table_name or self.table_name
+        collection = self._get_collection(table_name)
+        if not has_vector_index(self.client, collection):
+            logger.warning(
+                "Vector index missing on '%s'; searches scan the whole table. "
+                "If no deferred load is running, build it with "
+                "`load_image.py --build-index`.",
+                table_name,
+            )
+        warmup()
+        logger.info("Image store warmed up for table '%s'.", table_name)
+
     def _insert_batches(
         self,
         collection_name: str,
         rows: Iterable[ImageData],
         batch_size: int,
+        max_flush_interval: float = _DEFAULT_FLUSH_INTERVAL,
     ) -> Iterator[None]:
+        """
+        Group rows into batches and write them to the collection.
+
+        Writes run on background threads, each with its own database
+        connection, so the next batches keep being embedded while earlier
+        ones are sent. At most _WRITE_CONCURRENCY writes are in flight,
+        which keeps memory bounded to that many batches. A partial batch is
+        also flushed once its first row is older than max_flush_interval
+        seconds, even while no new rows arrive, so slow sources still make
+        steady progress.
+        """
         collection = self._get_collection(collection_name)
-        batch_ids: list[str] = []
-        batch_embeddings: list[list[float]] = []
-        batch_metadatas: list[dict[str, Any]] = []
-        batch_documents: list[str] = []
-
-        for img in rows:
-            composite_id = _make_composite_id(img.file_name, img.file_path)
-            batch_ids.append(composite_id)
-            batch_embeddings.append(img.embedding)
-            batch_metadatas.append(
-                {"file_name": img.file_name, "file_path": img.file_path}
+        # One list per batch; the id/embedding/metadata/document columns are
+        # built at their final size on the writer thread
+        batch: list[ImageData] = []
+
+        writer = ThreadPoolExecutor(
+            max_workers=self._WRITE_CONCURRENCY, thread_name_prefix="image-insert"
+        )
+        pending: deque[Future] = deque()
+        batch_start = 0.0
+        batches = 0
+        total = 0
+
+        def _flush_timeout() -> Optional[float]:
+            if not batch:
+                return None
+            return max(0.0, batch_start + max_flush_interval - time.monotonic())
+
+        try:
+            # Rows are pulled on a separate thread so a stalled source
+            # (slow mount, throttled API) can't hold back a partial batch
+            for img in _poll(rows, _flush_timeout):
+                if img is not None:
+                    if not batch:
+                        batch_start = time.monotonic()
+                    batch.append(img)
+                    yield
+                if batch and (
+                    len(batch) == batch_size
+                    or time.monotonic() - batch_start >= max_flush_interval
+                ):
+                    self._submit_write(writer, pending, collection, batch)
+                    batches += 1
+                    total += len(batch)
+                    batch = []
+                    if batches % self._LOG_EVERY_N_BATCHES == 0:
+                        logger.info("Queued %s images in %s batches.", total, batches)
+            if batch:
+                self._submit_write(writer, pending, collection, batch)
+                batches += 1
+                total += len(batch)
+            while pending:
+                pending.popleft().result()
+            logger.info("Upserted %s images in %s batches.", total, batches)
+        finally:
+            writer.shutdown(wait=True)
+
+    def _submit_write(
+        self,
+        writer: ThreadPoolExecutor,
+        pending: deque[Future],
+        collection,
+        batch: list[ImageData],
+    ) -> None:
+        """
+        Queue a batch write, first waiting for the oldest one (re-raising its
+        error) when the in-flight limit is reached.
+        """
+        if len(pending) >= self._WRITE_CONCURRENCY:
+            pending.popleft().result()
+        pending.append(writer.submit(self._write_batch, collection, batch))
+
+    def _write_batch(self, collection, batch: list[ImageData]) -> None:
+        """Upsert a batch with a single multi-row statement."""
+        # pymysql connections are not thread-safe, so each concurrent write
+        # borrows its own client; the pool grows to at most one per writer
+        try:
+            client = self._write_clients.get_nowait()
+        except queue.Empty:
+            client = self._client_factory()
+        try:
+            bulk_upsert(
+                client,
+                collection,
+                ids=[_make_image_id(img.file_path) for img in batch],
+                embeddings=[img.embedding for img in batch],
+                metadatas=[
+                    {"file_name": img.file_name, "file_path": img.file_path}
+                    for img in batch
+                ],
+                documents=[img.caption for img in batch],
             )
-            batch_documents.append(img.caption)
-            yield
-            if len(batch_ids) == batch_size:
-                collection.upsert(
-                    ids=batch_ids,
-                    embeddings=batch_embeddings,
-                    metadatas=batch_metadatas,
-                    documents=batch_documents,
-                )
-                logger.info("Upserted batch of %s images.", batch_size)
-                batch_ids, batch_embeddings, batch_metadatas, batch_documents = (
-                    [],
-                    [],
-                    [],
-                    [],
-                )
-        if batch_ids:
-            collection.upsert(
-                ids=batch_ids,
-                embeddings=batch_embeddings,
-                metadatas=batch_metadatas,
-                documents=batch_documents,
+        finally:
+            self._write_clients.put(client)
+        logger.debug("Upserted batch of %s images.", len(batch))
+
+    def _check_id_scheme(self, collection_name: str, collection) -> None:
+        """
+        Refuse to write into a collection keyed by the legacy ID scheme.
+
+        Rows used to be keyed by "{file_name}|{file_path}"; upserting with
+        the current path-hash IDs would add duplicates next to them
+        instead of updating them. Checked once per collection.
+        """
+        if collection_name in self._id_checked:
+            return
+        row_id = sample_row_id(self.client, collection)
+        if row_id is not None and _is_legacy_image_id(row_id):
+            raise RuntimeError(
+                f"Collection '{collection_name}' was loaded by an older version "
+                "with a different row ID format; re-loading into it would "
+                "duplicate every image. Drop the collection (or set a new "
+                "IMG_TABLE_NAME) and load the images again, see the README FAQ."
             )
-            logger.info("Upserted final batch of %s images.", len(batch_ids))
+        self._id_checked.add(collection_name)
 
     def load_amount(self, dir_path: str) -> int:
         """
@@ -114,22 +357,123 @@ class OBImageStore:
         dir_path: str,
         batch_size: int = _DEFAULT_BATCH_SIZE,
         table_name: Optional[str] = None,
+        paths: Optional[list[str]] = None,
+        workers: int = _DEFAULT_WORKERS,
+        max_flush_interval: float = _DEFAULT_FLUSH_INTERVAL,
+        defer_index: bool = False,
     ) -> Iterator:
         """
         Load images from a directory, creating collection if missing.
+
+        Pass ``paths`` (from ``enumerate_images``) to skip walking the
+        directory again when the caller already listed it. ``workers``
+        sets how many batches are embedded concurrently, and
+        ``max_flush_interval`` bounds how long a partial batch is held
+        before it is written.
+
+        With ``defer_index``, a bulk load into an empty collection drops
+        its vector index and builds it once over all rows at the end.
+        Searches during such a load scan the table without the index.
         """
         table_name = table_name or self.table_name
         # Ensure collection exists
-        self._get_collection(table_name)
-        total = load_amount(dir_path)
+        collection = self._get_collection(table_name)
+        self._check_id_scheme(table_name, collection)
+        index_dropped = (
+            defer_index
+            and is_collection_empty(self.client, collection)
+            and has_vector_index(self.client, collection)
+        )
+        if index_dropped:
+            drop_vector_index(self.client, collection)
+        if paths is None:
+            paths = enumerate_images(dir_path)
+        total = len(paths)
         logger.info(
             "Loading images from %s with batch size %s (total=%s).",
             dir_path,
             batch_size,
             total,
         )
-        rows = tqdm(load_imgs(dir_path), total=total)
-        yield from self._insert_batches(table_name, rows, batch_size)
+        embed_batch_size = min(batch_size, self._EMBED_BATCH_SIZE)
+        rows = tqdm(
+            load_imgs(dir_path, embed_batch_size, paths=paths, workers=workers),
+            total=total,
+        )
+        if not index_dropped:
+            yield from self._insert_batches(
+                table_name, rows, batch_size, max_flush_interval
+            )
+            return
+        try:
+            yield from self._insert_batches(
+                table_name, rows, batch_size, max_flush_interval
+            )
+        except BaseException:
+            # Don't let a failed rebuild replace the ingest error; it can be
+            # retried with finalize_ingest (load_image.py --build-index)
+            try:
+                self.finalize_ingest(table_name)
+            except Exception:
+                logger.exception(
+                    "Failed to rebuild vector index on '%s' after an "
+                    "interrupted load.",
+                    table_name,
+                )
+            raise
+        self.finalize_ingest(table_name)
+
+    def finalize_ingest(self, table_name: Optional[str] = None) -> None:
+        """
+        Build the vector index if a bulk load deferred it; a no-op otherwise.
+
+        Also recovers a collection left without its index by an interrupted
+        deferred load. Don't run it while such a load is still writing.
+        """
+        table_name = table_name or self.table_name
+        collection = self._get_collection(table_name)
+        if not has_vector_index(self.client, collection):
+            create_vector_index(self.client, collection)
+
+    # -------------------------------------------------------------------------
+    # Query image features
+    # -------------------------------------------------------------------------
+
+    def embed_query(self, image_path: str) -> list[float]:
+        """
+        Return the embedding of a query image, reusing earlier results.
+
+        Repeated searches with the same image (e.g. while tuning search
+        options in the UI) skip the embedding API call. Entries are keyed
+        by file content, so a rewritten file is embedded again.
+        """
+        return self._cached_query_feature(self._query_embeddings, image_path, embed_img)
+
+    def caption_query(self, image_path: str) -> str:
+        """
+        Return the caption of a query image, reusing earlier results.
+
+        Placeholder captions (missing VLM key, failed request) are not
+        cached, so they are retried on the next search.
+        """
+        return self._cached_query_feature(self._query_captions, image_path, caption_img)
+
+    def _cached_query_feature(self, cache: OrderedDict, image_path: str, compute):
+        with open(image_path, "rb") as f:
+            key = hashlib.blake2b(f.read(), digest_size=16).digest()
+        with self._query_cache_lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+                return value
+        value = compute(image_path)
+        if isinstance(value, str) and is_placeholder_caption(value):
+            return value
+        with self._query_cache_lock:
+            cache[key] = value
+            while len(cache) > self._QUERY_CACHE_SIZE:
+                cache.popitem(last=False)
+        return value
 
     # -------------------------------------------------------------------------
     # Search methods
@@ -144,11 +488,40 @@ class OBImageStore:
         """
         Search similar images by embedding distance (vector-only).
         """
+        logger.info("Searching similar images for %s.", image_path)
+        target_embedding = self.embed_query(image_path)
+        return self.search_embedding(target_embedding, limit, table_name)
+
+    def search_embedding(
+        self,
+        target_embedding: Sequence[float],
+        limit: int = 10,
+        table_name: Optional[str] = None,
+        distance_threshold: Optional[float] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Search similar images for a precomputed query embedding.
+
+        With ``distance_threshold``, neighbours farther than it are dropped
+        by the database rather than fetched and filtered here.
+        """
         table_name = table_name or self.table_name
         collection = self._get_collection(table_name)
 
-        logger.info("Searching similar images for %s.", image_path)
-        target_embedding = embed_img(image_path)
+        if distance_threshold is not None:
+            rows = vector_search_within(
+                self.client, collection, target_embedding, limit, distance_threshold
+            )
+            logger.info("ANN search within %.2f returned %s results.", distance_threshold, len(rows))
+            return [
+                {
+                    "file_name": meta.get("file_name", ""),
+                    "file_path": meta.get("file_path", ""),
+                    "caption": caption,
+                    "distance": distance,
+                }
+                for meta, caption, distance in rows
+            ]
 
         results = collection.query(
             query_embeddings=[target_embedding],
@@ -156,10 +529,10 @@ class OBImageStore:
             include=["metadatas", "documents"],
         )
 
-        ids = results.get("ids", [[]])[0]
-        metadatas = results.get("metadatas", [[]])[0]
-        documents = results.get("documents", [[]])[0]
-        distances = results.get("distances", [[]])[0]
+        ids = _first(results, "ids")
+        metadatas = _first(results, "metadatas")
+        documents = _first(results, "documents")
+        distances = _first(results, "distances")
 
         logger.info("ANN search returned %s results.", len(ids))
         return self._format_query_results(ids, metadatas, documents, distances)
@@ -171,7 +544,7 @@ class OBImageStore:
         table_name: Optional[str] = None,
     ) -> list[dict[str, Any]]:
         """
-        Full-text search based on caption via collection.get + $contains.
+        Full-text search based on caption, ranked by match relevance.
 
         Args:
             query_text: Text query for searching captions.
@@ -179,24 +552,24 @@ class OBImageStore:
             table_name: Optional collection name override.
 
         Returns:
-            List of matching images.
+            List of matching images, best match first.
         """
         table_name = table_name or self.table_name
         collection = self._get_collection(table_name)
 
         logger.info("Performing text search with query: %s", query_text)
-        results = collection.get(
-            where_document={"$contains": query_text},
-            limit=limit,
-            include=["metadatas", "documents"],
-        )
-
-        ids = results.get("ids", [])
-        metadatas = results.get("metadatas", [])
-        documents = results.get("documents", [])
-
-        logger.info("Text search returned %s results.", len(ids))
-        return self._format_get_results(ids, metadatas, documents)
+        rows = fulltext_search(self.client, collection, query_text, limit)
+
+        logger.info("Text search returned %s results.", len(rows))
+        return [
+            {
+                "file_name": meta.get("file_name", ""),
+                "file_path": meta.get("file_path", ""),
+                "caption": caption,
+                "distance": None,
+            }
+            for meta, caption in rows
+        ]
 
     def hybrid_search(
         self,
@@ -230,31 +603,30 @@ class OBImageStore:
 
         # Pure vector search
         if vector_weight == 1.0:
-            results = self.search(image_path, limit=limit)
-            if distance_threshold is not None:
-                results = [
-                    r for r in results if r.get("distance", 0) <= distance_threshold
-                ]
+            logger.info("Searching similar images for %s.", image_path)
+            results = self.search_embedding(
+                self.embed_query(image_path),
+                limit=limit,
+                distance_threshold=distance_threshold,
+            )
             logger.info("Pure vector search returned %s results.", len(results))
             return results
 
         # Pure text search
         if vector_weight == 0.0:
-            from .embeddings import caption_img
-
-            query_caption = caption_img(image_path)
+            query_caption = self.caption_query(image_path)
             results = self.text_search(query_caption, limit=limit)
             for r in results:
                 r["distance"] = None
             logger.info("Pure text search returned %s results.", len(results))
             return results
 
-        # Hybrid: use pyseekdb native hybrid_search with RRF
-        from .embeddings import caption_img
-
+        # Hybrid: use pyseekdb native hybrid_search with RRF. The embedding
+        # and caption are independent API calls, so compute them concurrently
         logger.info("Performing hybrid search for %s.", image_path)
-        target_embedding = embed_img(image_path)
-        query_caption = caption_img(image_path)
+        caption_future = self._query_executor.submit(self.caption_query, image_path)
+        target_embedding = self.embed_query(image_path)
+        query_caption = caption_future.result()
 
         table_name = self.table_name
         collection = self._get_collection(table_name)
@@ -274,10 +646,10 @@ class OBImageStore:
             include=["metadatas", "documents"],
         )
 
-        ids = results.get("ids", [[]])[0]
-        metadatas = results.get("metadatas", [[]])[0]
-        documents = results.get("documents", [[]])[0]
-        distances = results.get("distances", [[]])[0] if results.get("distances") else []
+        ids = _first(results, "ids")
+        metadatas = _first(results, "metadatas")
+        documents = _first(results, "documents")
+        distances = _first(results, "distances")
 
         formatted = self._format_query_results(ids, metadatas, documents, distances)
 
@@ -308,46 +680,19 @@ class OBImageStore:
         distances: list[float],
     ) -> list[dict[str, Any]]:
         """Format pyseekdb query/hybrid_search results (nested list already unpacked)."""
-        results = []
-        for i, cid in enumerate(ids):
-            meta = metadatas[i] if i < len(metadatas) else {}
-            file_name = meta.get("file_name", "")
-            file_path = meta.get("file_path", "")
-            if not file_name and not file_path:
-                file_name, file_path = _split_composite_id(cid)
-            caption = documents[i] if i < len(documents) else ""
-            distance = distances[i] if i < len(distances) else None
-            results.append(
-                {
-                    "file_name": file_name,
-                    "file_path": file_path,
-                    "caption": caption,
-                    "distance": distance,
-                }
-            )
-        return results
-
-    def _format_get_results(
-        self,
-        ids: list[str],
-        metadatas: list[dict[str, Any]],
-        documents: list[str],
-    ) -> list[dict[str, Any]]:
-        """Format pyseekdb collection.get results (flat lists, no distances)."""
-        results = []
-        for i, cid in enumerate(ids):
-            meta = metadatas[i] if i < len(metadatas) else {}
-            file_name = meta.get("file_name", "")
-            file_path = meta.get("file_path", "")
-            if not file_name and not file_path:
-                file_name, file_path = _split_composite_id(cid)
-            caption = documents[i] if i < len(documents) else ""
-            results.append(
-                {
-                    "file_name": file_name,
-                    "file_path": file_path,
-                    "caption": caption,
-                    "distance": None,
-                }
-            )
-        return results
+        # Pad the optional columns once; zip stops at the last id
+        rows = zip(
+            ids,
+            chain(metadatas, repeat(None)),
+            chain(documents, repeat(None)),
+            chain(distances, repeat(None)),
+        )
+        return [
+            {
+                "file_name": (meta or {}).get("file_name", ""),
+                "file_path": (meta or {}).get("file_path", ""),
+                "caption": caption or "",
+                "distance": distance,
+            }
+            for _, meta, caption, distance in rows
+        ]
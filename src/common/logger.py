@@ -4,7 +4,10 @@ Shared logging setup for the image search project.
 
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 
@@ -40,8 +43,17 @@ def _configure_base_logger() -> logging.Logger:
     file_handler.setLevel(_LOG_LEVEL)
     file_handler.setFormatter(formatter)
 
-    base_logger.addHandler(console_handler)
-    base_logger.addHandler(file_handler)
+    # Callers only enqueue records; a background listener does the console
+    # and file I/O so logging never blocks the ingest or request path
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    # Flush whatever is still queued when the interpreter exits
+    atexit.register(listener.stop)
+
+    base_logger.addHandler(QueueHandler(log_queue))
     _CONFIGURED = True
     return base_logger
 
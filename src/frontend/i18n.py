@@ -1,197 +1,81 @@
 """
-Simple i18n helper with built-in translation dictionary.
+Simple i18n helper with per-language translation files.
+
+Translations live in ``locales/<lang>.json``; only the selected language
+is read, on first use.
 """
 
+import functools
+import json
 import os
+import types
+from pathlib import Path
 
 from common.logger import get_logger
 
 # Logger for i18n helpers
 logger = get_logger(__name__)
 
-# Translation table keyed by language code
-tr = {
-    "en": {
-        "title": "🔍 Image Search",
-        "caption": "🚀 Similar Image Search application built with vector retrieval feature of OceanBase database",
-        "settings": "🔧 Settings",
-        "search_setting": "Searching Setting",
-        "table_name_input": "Table Name",
-        "table_name_help": "Name of the table that stores image vectors and other data",
-        "recall_number": "Recall Number",
-        "recall_number_help": "How many similar images to return",
-        "search_mode": "Search Mode",
-        "search_mode_help": "Choose how to search: full-text only, hybrid (vector + text), or vector only",
-        "search_mode_text": "Full-text",
-        "search_mode_hybrid": "Hybrid",
-        "search_mode_vector": "Vector",
-        "distance_threshold": "Vector Search Distance Threshold",
-        "distance_threshold_help": "Only show results with distance <= this value (only effective in vector mode)",
-        "show_distance": "Show Distance",
-        "show_file_path": "Show File Path",
-        "load_setting": "Loading Setting",
-        "image_base_input": "Image Base",
-        "image_base_help": "Absolute path of directory containing images to load",
-        "image_base_placeholder": "Absolute path like /data/imgs",
-        "load_images": "Load Images",
-        "set_table_name_pls": "Set table name first please",
-        "set_image_base_pls": "Set image base first please",
-        "image_base_not_exist": "The image base directory you set ({}) does not exist",
-        "images_loading": "Loading images...",
-        "images_loading_progress": "Loading images... (Finished {} / {})",
-        "images_loaded": "All images are loaded successfully!",
-        "image_upload_label": "Choose an image to upload...",
-        "image_upload_help": "Upload an image to search for similar images",
-        "image_search_button": "🔍 Search Similar Images",
-        "uploaded_image_header": "Upload Image",
-        "uploaded_image_caption": "📌 Uploaded Image",
-        "similar_images_header": "Similar Images",
-        "no_similar_images": "No similar images found",
-        "image_no": "Image {}",
-        "distance": "📏 Distance:",
-        "file_path": "📂 File path:",
-        "image_caption": "📝 Description:",
-        "table_not_exist": "The table {} does not exist, load images first please",
-        "upload_image_archive": "Upload Image Archive",
-        "image_archive": "Image Archive",
-        "image_archive_help": "Select an image archive file and click Load Images to extract and load images",
-        "text_search_header": "🔍 Text Search",
-        "text_search_label": "Enter keywords to search images",
-        "text_search_placeholder": "e.g.: cat, dog, sunset, mountain...",
-        "search_button": "🔍 Search",
-        "text_search_query_header": "Search Query",
-        "text_search_query_caption": "📝 Your search keywords",
-        "search_results_header": "Search Results",
-        "search_query": "Search Query",
-        "no_search_results": "No matching images found",
-        "text_search_empty_warning": "Please enter search keywords",
-        "text_score": "🎯 Score:",
-    },
-    "zh": {
-        "title": "🔍 图像搜索应用",
-        "caption": "🚀 基于 OceanBase 向量检索能力构建的相似图像搜索应用",
-        "settings": "🔧 应用设置",
-        "search_setting": "图片搜索设置",
-        "table_name_input": "表名",
-        "table_name_help": "用于存放图片的向量和其他数据的表名",
-        "recall_number": "召回数量",
-        "recall_number_help": "需要返回多少张相似照片",
-        "search_mode": "搜索模式",
-        "search_mode_help": "选择搜索方式：纯全文、混合（向量+全文）或纯向量",
-        "search_mode_text": "全文检索",
-        "search_mode_hybrid": "混合检索",
-        "search_mode_vector": "向量检索",
-        "distance_threshold": "向量搜索距离阈值",
-        "distance_threshold_help": "只显示距离小于等于该值的结果（仅在向量检索模式下生效）",
-        "show_distance": "显示距离",
-        "show_file_path": "显示文件路径",
-        "load_setting": "图片加载设置",
-        "image_base_input": "图片加载目录",
-        "image_base_help": "需要加载的图片目录路径",
-        "image_base_placeholder": "图片目录的绝对路径，如 /data/imgs",
-        "load_images": "加载图片",
-        "set_table_name_pls": "请设置表名",
-        "set_image_base_pls": "请设置图片加载目录",
-        "image_base_not_exist": "您设置的图片加载目录 {} 不存在",
-        "images_loading": "图片加载中...",
-        "images_loading_progress": "图片加载中... (已完成 {} / {})",
-        "images_loaded": "所有图片加载完成！",
-        "image_upload_label": "选择一张图片...",
-        "image_upload_help": "上传一张图片以搜索相似图片",
-        "image_search_button": "🔍 搜索相似图片",
-        "uploaded_image_header": "上传图片",
-        "uploaded_image_caption": "📌 您上传的图片",
-        "similar_images_header": "相似图片",
-        "no_similar_images": "没有找到相似图片",
-        "image_no": "图片 {}",
-        "distance": "📏 距离:",
-        "file_path": "📂 文件路径:",
-        "image_caption": "📝 描述:",
-        "table_not_exist": "图片表 {} 不存在，请先加载图片",
-        "upload_image_archive": "上传图片压缩包",
-        "image_archive": "图片压缩包",
-        "image_archive_help": "选中一个已上传的图片压缩包，点击加载图片来批量加载图片",
-        "text_search_header": "🔍 文本搜索",
-        "text_search_label": "输入关键词搜索图片",
-        "text_search_placeholder": "例如：cat, dog, sunset, mountain...",
-        "search_button": "🔍 搜索",
-        "text_search_query_header": "搜索关键词",
-        "text_search_query_caption": "📝 您的搜索关键词",
-        "search_results_header": "搜索结果",
-        "search_query": "搜索关键词",
-        "no_search_results": "未找到匹配的图片",
-        "text_search_empty_warning": "请输入搜索关键词",
-        "text_score": "🎯 匹配分数:",
-    },
-    "ja": {
-        "title": "🔍 画像検索アプリ",
-        "caption": "🚀 OceanBase のベクトル検索機能で構築された類似画像検索アプリケーション",
-        "settings": "🔧 設定",
-        "search_setting": "検索設定",
-        "table_name_input": "テーブル名",
-        "table_name_help": "画像ベクトルなどを保存するテーブル名",
-        "recall_number": "リコール数",
-        "recall_number_help": "リコール（検索）する類似画像の枚数を指定してください",
-        "search_mode": "検索モード",
-        "search_mode_help": "検索方法を選択：全文検索のみ、ハイブリッド（ベクトル＋全文）、ベクトルのみ",
-        "search_mode_text": "全文検索",
-        "search_mode_hybrid": "ハイブリッド",
-        "search_mode_vector": "ベクトル検索",
-        "distance_threshold": "ベクトル検索距離しきい値",
-        "distance_threshold_help": "距離がこの値以下の結果のみ表示します（ベクトル検索モードでのみ有効）",
-        "show_distance": "距離を表示する",
-        "show_file_path": "ファイルパスを表示する",
-        "load_setting": "読み込み設定",
-        "image_base_input": "画像ディレクトリ",
-        "image_base_help": "読み込む画像ディレクトリのパスを指定してください",
-        "image_base_placeholder": "画像ディレクトリの絶対パス（例: /data/imgs）",
-        "load_images": "画像を読み込む",
-        "set_table_name_pls": "先にテーブル名を設定してください",
-        "set_image_base_pls": "先に画像ディレクトリを設定してください",
-        "image_base_not_exist": "設定された画像ディレクトリ {} が存在しません",
-        "images_loading": "画像を読み込んでいます...",
-        "images_loading_progress": "画像を読み込んでいます... (完了 {} / {})",
-        "images_loaded": "すべての画像が正常に読み込まれました！",
-        "image_upload_label": "画像を選択してください...",
-        "image_upload_help": "類似画像を検索するための画像をアップロードします",
-        "image_search_button": "🔍 類似画像を検索",
-        "uploaded_image_header": "アップロード画像",
-        "uploaded_image_caption": "📌 アップロードされた画像",
-        "similar_images_header": "類似画像",
-        "no_similar_images": "類似画像が見つかりませんでした",
-        "image_no": "画像 {}",
-        "distance": "📏 距離:",
-        "file_path": "📂 ファイルパス:",
-        "image_caption": "📝 説明:",
-        "table_not_exist": "画像テーブル {} が存在しません。先に画像を読み込んでください",
-        "upload_image_archive": "画像用圧縮ファイルのアップロード",
-        "image_archive": "画像用圧縮ファイル",
-        "image_archive_help": "アップロードされた圧縮ファイルを選択し、「画像を読み込む」をクリックして一括処理します",
-        "text_search_header": "🔍 テキスト検索",
-        "text_search_label": "キーワードを入力して画像を検索",
-        "text_search_placeholder": "例：cat, dog, sunset, mountain...",
-        "search_button": "🔍 検索",
-        "text_search_query_header": "検索クエリ",
-        "text_search_query_caption": "📝 検索キーワード",
-        "search_results_header": "検索結果",
-        "search_query": "検索クエリ",
-        "no_search_results": "一致する画像が見つかりませんでした",
-        "text_search_empty_warning": "検索キーワードを入力してください",
-        "text_score": "🎯 スコア:",
-    },
-}
+# Directory holding one JSON translation table per language code
+_LOCALES_DIR = Path(__file__).resolve().parent / "locales"
+SUPPORTED_LANGS = ("en", "zh", "ja")
 
 # Read UI language from env and fallback to zh
 lang = os.getenv("UI_LANG", "zh")
-if lang not in ["en", "zh", "ja"]:
+if lang not in SUPPORTED_LANGS:
     logger.warning("Invalid language %s, using default (zh).", lang)
     lang = "zh"
 
 
+class _Translations(dict):
+    """Translation table that renders missing keys as a TODO marker."""
+
+    __slots__ = ()
+
+    def __missing__(self, key: str) -> str:
+        return "TODO: " + key
+
+
+@functools.lru_cache(maxsize=None)
+def _load(lang_code: str) -> _Translations:
+    """Read the translation table of a language."""
+    with open(_LOCALES_DIR / f"{lang_code}.json", encoding="utf-8") as f:
+        return _Translations(json.load(f))
+
+
+@functools.lru_cache(maxsize=512)
+def _template(key: str) -> str:
+    """
+    Resolve a key to its translated template.
+
+    Streamlit reruns the page script on every interaction, so the same
+    labels are looked up over and over. ``lang`` is fixed after startup;
+    call ``_template.cache_clear()`` if it is ever changed.
+    """
+    return _load(lang)[key]
+
+
 def t(key: str, *args) -> str:
     """
     Translate a key with optional format arguments.
     """
     if len(args) > 0:
-        return tr[lang].get(key, "TODO: " + key).format(*args)
-    return tr[lang].get(key, "TODO: " + key)
+        return _template(key).format(*args)
+    return _template(key)
+
+
+@functools.lru_cache(maxsize=64)
+def t_parts(key: str) -> tuple[str, ...]:
+    """
+    Split a translated template at its ``{}`` placeholders.
+
+    Hot loops join the parts with f-strings instead of re-parsing the
+    template through ``str.format`` on every call.
+    """
+    return tuple(_template(key).split("{}"))
+
+
+# Labels of the selected language as attributes (STR.title), resolved once
+# at import; keys with {} placeholders still go through t(). Other
+# languages' tables are never read
+STR = types.SimpleNamespace(**_load(lang))
@@ -2,27 +2,30 @@
 Streamlit frontend for loading and searching images.
 """
 
+import hashlib
 import os
 import re
+import tempfile
 import time
 from dataclasses import dataclass
 from pathlib import Path
 
 import streamlit as st
-from dotenv import load_dotenv
 
 from common.db import build_client
+from common.embeddings import enumerate_images
 from common.image_store import OBImageStore
 from common.logger import get_logger
-from common.compress import extract_bundle
-from frontend.i18n import t
+from common.compress import extract_bundle, save_stream
+from frontend.i18n import STR, t, t_parts
 
 # Logger for Streamlit app
 logger = get_logger(__name__)
 
-# Load environment variables for configuration
-load_dotenv()
-logger.info("Environment variables loaded for frontend.")
+# Emoji stripped from the title for the browser tab
+_EMOJI_RE = re.compile(r'[\U0001F300-\U0001F9FF]')
+# Browser tab title; the UI language is fixed for the process
+_PAGE_TITLE = _EMOJI_RE.sub('', STR.title).strip()
 
 @dataclass(frozen=True)
 class AppPaths:
@@ -30,14 +33,21 @@ class AppPaths:
     data_dir: Path
     demo_dir: Path
     tmp_dir: Path
-    tmp_path: Path
+    queries_dir: Path
     archives_dir: Path
     extracted_dir: Path
     icon_path: Path
     logo_path: Path
 
 
+@st.cache_resource(show_spinner=False)
 def build_paths() -> AppPaths:
+    """
+    Resolve the app's data paths once per server process.
+
+    Path.resolve() touches the filesystem, and the page script reruns on
+    every interaction.
+    """
     base_dir = Path(__file__).resolve().parents[2]
     data_dir = base_dir / "data"
     demo_dir = data_dir / "demo"
@@ -48,7 +58,7 @@ def build_paths() -> AppPaths:
         data_dir=data_dir,
         demo_dir=demo_dir,
         tmp_dir=tmp_dir,
-        tmp_path=tmp_dir / "temp.jpg",
+        queries_dir=tmp_dir / "queries",
         archives_dir=tmp_dir / "archives",
         extracted_dir=tmp_dir / "extracted",
         icon_path=demo_dir / "ob-icon.png",
@@ -61,30 +71,37 @@ def configure_page(paths: AppPaths) -> None:
     if paths.icon_path.exists():
         page_icon = str(paths.icon_path.resolve())
 
-    page_title_text = re.sub(r'[\U0001F300-\U0001F9FF]', '', t("title")).strip()
     st.set_page_config(
         layout="wide",
-        page_title=page_title_text,
+        page_title=_PAGE_TITLE,
         page_icon=page_icon,
     )
     logger.info("Streamlit page configured.")
 
 
 def render_header() -> None:
-    st.title(t("title"))
-    st.caption(t("caption"))
+    st.title(STR.title)
+    st.caption(STR.caption)
 
 
 def ensure_temp_dirs(paths: AppPaths) -> None:
     os.makedirs(paths.archives_dir, exist_ok=True)
     os.makedirs(paths.extracted_dir, exist_ok=True)
+    os.makedirs(paths.queries_dir, exist_ok=True)
     logger.info("Temp directories ensured.")
 
 
 def ensure_session_state() -> None:
     if "archives" not in st.session_state:
-        st.session_state.archives = {}
+        # Names of archives already saved in this session
+        st.session_state.archives = set()
         logger.info("Session state initialized for archives.")
+    if "archive_digests" not in st.session_state:
+        # Content digest -> name of the saved archive with that content
+        st.session_state.archive_digests = {}
+    if "archive_aliases" not in st.session_state:
+        # Uploaded name -> saved archive it duplicates (not written to disk)
+        st.session_state.archive_aliases = {}
 
 
 def persist_archive_upload(uploaded_file, paths: AppPaths) -> None:
@@ -92,10 +109,29 @@ def persist_archive_upload(uploaded_file, paths: AppPaths) -> None:
         return
     if uploaded_file.name in st.session_state.archives:
         return
+    # The same content under another name would be written and extracted
+    # again; point at the copy already saved instead. Aliases are checked
+    # against the digest, since a name may later be reused for new content
+    digest = hashlib.blake2b(uploaded_file.getbuffer(), digest_size=16).hexdigest()
+    saved_name = st.session_state.archive_digests.get(digest)
+    duplicate_of = st.session_state.archive_aliases.pop(uploaded_file.name, None)
+    if saved_name is not None and (paths.archives_dir / saved_name).exists():
+        # Not written, so it never shows up in the archive list; tell the
+        # user which archive to pick instead
+        st.session_state.archive_aliases[uploaded_file.name] = saved_name
+        if duplicate_of != saved_name:
+            logger.info(
+                "Archive %s has the same content as %s; skipping save.",
+                uploaded_file.name,
+                saved_name,
+            )
+        st.info(t("archive_duplicate", uploaded_file.name, saved_name))
+        return
     archive_path = paths.archives_dir / uploaded_file.name
-    with open(archive_path, "wb") as f:
-        f.write(uploaded_file.read())
-    st.session_state.archives[uploaded_file.name] = True
+    uploaded_file.seek(0)
+    save_stream(uploaded_file, str(archive_path))
+    st.session_state.archives.add(uploaded_file.name)
+    st.session_state.archive_digests[digest] = uploaded_file.name
     logger.info("Archive uploaded: %s", uploaded_file.name)
     st.rerun()
 
@@ -105,49 +141,65 @@ def render_sidebar_logo(paths: AppPaths) -> None:
         st.logo(paths.logo_path)
 
 
+@st.cache_data(show_spinner=False)
+def list_archives(archives_dir: str, mtime_ns: int) -> list[str]:
+    """
+    List uploaded archives.
+
+    Keyed by the directory's mtime, so reruns reuse the listing until an
+    archive is added or removed.
+    """
+    # scandir reports entry types without an extra stat per name, so
+    # leftover directories can be skipped for free
+    with os.scandir(archives_dir) as entries:
+        return [entry.name for entry in entries if entry.is_file()]
+
+
 def render_sidebar_inputs(paths: AppPaths) -> tuple[str, int, float, float, bool, bool, str, bool]:
-    st.title(t("settings"))
-    st.subheader(t("search_setting"))
+    st.title(STR.settings)
+    st.subheader(STR.search_setting)
     table_name = os.getenv("IMG_TABLE_NAME", "image_search")
-    top_k = st.slider(t("recall_number"), 1, 30, 10, help=t("recall_number_help"))
-    _mode_labels = [t("search_mode_text"), t("search_mode_hybrid"), t("search_mode_vector")]
+    top_k = st.slider(STR.recall_number, 1, 30, 10, help=STR.recall_number_help)
+    _mode_labels = [STR.search_mode_text, STR.search_mode_hybrid, STR.search_mode_vector]
     _mode_weights = {_mode_labels[0]: 0.0, _mode_labels[1]: 0.5, _mode_labels[2]: 1.0}
     selected_mode = st.select_slider(
-        t("search_mode"),
+        STR.search_mode,
         options=_mode_labels,
         value=_mode_labels[1],
-        help=t("search_mode_help"),
+        help=STR.search_mode_help,
     )
     vector_weight = _mode_weights[selected_mode]
     import math
     embedding_dim = int(os.getenv("EMBEDDING_DIMENSION", "1024"))
     default_threshold = round(0.6 * math.sqrt(embedding_dim / 512), 2)
     distance_threshold = st.number_input(
-        t("distance_threshold"),
+        STR.distance_threshold,
         min_value=0.0,
         value=default_threshold,
         step=0.01,
-        help=t("distance_threshold_help"),
+        help=STR.distance_threshold_help,
     )
-    show_distance = st.checkbox(t("show_distance"), value=True)
-    show_file_path = st.checkbox(t("show_file_path"), value=True)
+    show_distance = st.checkbox(STR.show_distance, value=True)
+    show_file_path = st.checkbox(STR.show_file_path, value=True)
 
-    st.subheader(t("load_setting"))
+    st.subheader(STR.load_setting)
     archive = st.file_uploader(
-        t("upload_image_archive"),
+        STR.upload_image_archive,
         type=["zip", "tar", "tar.gz", "bz2", "xz"],
     )
     persist_archive_upload(archive, paths)
 
-    archives = os.listdir(paths.archives_dir)
+    archives = list_archives(
+        str(paths.archives_dir), paths.archives_dir.stat().st_mtime_ns
+    )
     selected_archive = st.selectbox(
-        t("image_archive"),
-        help=t("image_archive_help"),
+        STR.image_archive,
+        help=STR.image_archive_help,
         options=archives,
         index=0,
         key="image_archive",
     )
-    click_load = st.button(t("load_images"))
+    click_load = st.button(STR.load_images)
     return table_name, top_k, vector_weight, distance_threshold, show_distance, show_file_path, selected_archive, click_load
 
 
@@ -157,20 +209,30 @@ def load_images_from_archive(
     table_name: str,
     paths: AppPaths,
 ) -> None:
-    source = paths.archives_dir / selected_archive
-    target = paths.extracted_dir / selected_archive
+    source = str(paths.archives_dir / selected_archive)
+    target = str(paths.extracted_dir / selected_archive)
     logger.info("Loading archive %s into %s", source, target)
-    extract_bundle(str(source), str(target))
-    total = store.load_amount(str(target))
+    extract_bundle(source, target)
+    # List the images once and reuse them for the progress total and loading
+    image_paths = enumerate_images(target)
+    total = len(image_paths)
     finished = 0
-    bar = st.progress(0, text=t("images_loading"))
-    for _ in store.load_image_dir(str(target), table_name=table_name):
+    bar = st.progress(0, text=STR.images_loading)
+    progress_head, progress_mid, progress_tail = t_parts("images_loading_progress")
+    # Each update is a websocket push; cap them at ~100 per load
+    update_every = max(1, total // 100)
+    last_update = 0
+    for _ in store.load_image_dir(target, table_name=table_name, paths=image_paths):
         finished += 1
-        bar.progress(
-            finished / total,
-            text=t("images_loading_progress", finished, total),
-        )
-    st.toast(t("images_loaded"), icon="🎉")
+        if finished == total or finished - last_update >= update_every:
+            bar.progress(
+                finished / total,
+                text=f"{progress_head}{finished}{progress_mid}{total}{progress_tail}",
+            )
+            last_update = finished
+    # New rows may change any earlier search result
+    cached_hybrid_search.clear()
+    st.toast(STR.images_loaded, icon="🎉")
     st.balloons()
     time.sleep(2)
     logger.info("Image loading completed: %s images.", total)
@@ -184,23 +246,113 @@ def render_results_tabs(
 ) -> None:
     """Render search results in tabs (shared by image and text search)"""
     if len(results) == 0:
-        st.warning(t("no_similar_images"))
+        st.warning(STR.no_similar_images)
     else:
-        tabs = st.tabs([t("image_no", i + 1) for i in range(len(results))])
+        tab_head, tab_tail = t_parts("image_no")
+        tabs = st.tabs([f"{tab_head}{i}{tab_tail}" for i in range(1, len(results) + 1)])
         for res, tab in zip(results, tabs):
             with tab:
                 # Show distance for vector search
                 if show_distance and res.get("distance") is not None:
-                    st.write(t("distance"), f"{res['distance']:.8f}")
+                    st.write(STR.distance, f"{res['distance']:.8f}")
                 # Show text score for text search
                 if res.get("text_score") is not None:
-                    st.write(t("text_score"), f"{res.get('text_score', 0):.4f}")
+                    st.write(STR.text_score, f"{res.get('text_score', 0):.4f}")
                 if show_file_path:
-                    st.write(t("file_path"), os.path.join(res["file_path"]))
-                st.write(t("image_caption"), res.get("caption", ""))
+                    st.write(STR.file_path, res["file_path"])
+                st.write(STR.image_caption, res.get("caption", ""))
                 st.image(res["file_path"])
 
 
+# Query image files unused for this long are deleted when another query
+# image is saved; every search touches its file first, so a file still in
+# use is never removed
+_QUERY_FILE_MAX_AGE = 600
+
+
+def persist_query_image(uploaded_image, queries_dir: Path) -> tuple[str, Path]:
+    """
+    Write the query image to a file named by its content digest.
+
+    Returns the digest and the file path. Sessions never share a file for
+    different images, and the write is skipped when the same image was
+    already saved, e.g. when it is searched again with other options.
+    """
+    digest = hashlib.blake2b(uploaded_image.getbuffer(), digest_size=16).hexdigest()
+    suffix = Path(uploaded_image.name).suffix.lower() or ".jpg"
+    query_path = queries_dir / f"{digest}{suffix}"
+    try:
+        # Mark the file as in use so it isn't pruned
+        os.utime(query_path)
+        return digest, query_path
+    except FileNotFoundError:
+        pass
+    # Write under a unique name and rename into place, so a concurrent
+    # search for the same image never reads a partial file
+    fd, partial_path = tempfile.mkstemp(dir=queries_dir, suffix=".part")
+    os.close(fd)
+    try:
+        uploaded_image.seek(0)
+        save_stream(uploaded_image, partial_path)
+        os.replace(partial_path, query_path)
+    except BaseException:
+        os.unlink(partial_path)
+        raise
+    prune_query_images(queries_dir)
+    return digest, query_path
+
+
+def prune_query_images(queries_dir: Path) -> None:
+    """
+    Delete query image files unused for _QUERY_FILE_MAX_AGE seconds.
+
+    Also removes partial writes left behind by a crashed session.
+    """
+    cutoff = time.time() - _QUERY_FILE_MAX_AGE
+    removed = 0
+    with os.scandir(queries_dir) as entries:
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                # Pruned concurrently by another session
+                continue
+    if removed:
+        logger.info("Removed %s stale query images.", removed)
+
+
+# Results may change as images are loaded from other processes (CLI,
+# backend), so entries expire instead of living until the next UI load
+_SEARCH_CACHE_TTL = 60
+
+
+@st.cache_data(show_spinner=False, max_entries=64, ttl=_SEARCH_CACHE_TTL)
+def cached_hybrid_search(
+    _store: OBImageStore,
+    image_digest: str,
+    image_path: str,
+    table_name: str,
+    top_k: int,
+    vector_weight: float,
+    distance_threshold: float,
+) -> list:
+    """
+    Search once per (image content, search options).
+
+    image_digest keys the cache on the upload's content, so only a new
+    image or changed options trigger a search. Entries expire after
+    _SEARCH_CACHE_TTL seconds and are cleared after a load from the UI.
+    """
+    return _store.hybrid_search(
+        image_path,
+        limit=top_k,
+        vector_weight=vector_weight,
+        distance_threshold=distance_threshold,
+    )
+
+
 def render_search_results(
     store: OBImageStore,
     uploaded_image,
@@ -210,27 +362,28 @@ def render_search_results(
     distance_threshold: float,
     show_distance: bool,
     show_file_path: bool,
-    tmp_path: Path,
+    queries_dir: Path,
 ) -> None:
     col1, col2 = st.columns(2)
-    col1.subheader(t("uploaded_image_header"))
-    col1.caption(t("uploaded_image_caption"))
+    col1.subheader(STR.uploaded_image_header)
+    col1.caption(STR.uploaded_image_caption)
 
-    with open(tmp_path, "wb") as f:
-        f.write(uploaded_image.read())
+    digest, query_path = persist_query_image(uploaded_image, queries_dir)
 
-    # Generate caption for uploaded image
-    from common.embeddings import caption_img
-    caption = caption_img(str(tmp_path))
-    col1.write(f"{t('image_caption')} {caption}")
+    # Generate caption for uploaded image; hybrid/text search below reuses it
+    caption = store.caption_query(str(query_path))
+    col1.write(f"{STR.image_caption} {caption}")
     col1.image(uploaded_image)
 
-    col2.subheader(t("similar_images_header"))
-    results = store.hybrid_search(
-        str(tmp_path),
-        limit=top_k,
-        vector_weight=vector_weight,
-        distance_threshold=distance_threshold,
+    col2.subheader(STR.similar_images_header)
+    results = cached_hybrid_search(
+        store,
+        digest,
+        str(query_path),
+        table_name,
+        top_k,
+        vector_weight,
+        distance_threshold,
     )
     logger.info("Search returned %s results.", len(results))
     with col2:
@@ -238,10 +391,19 @@ def render_search_results(
 
 
 def init_store() -> OBImageStore:
-    logger.info("Initializing image store for frontend.")
-    return OBImageStore(
-        client=build_client(),
-    )
+    """
+    Return this session's image store, creating it on the first run.
+
+    Kept in session state rather than st.cache_resource: the store's
+    client holds a single pymysql connection, which must not be shared
+    by sessions running on different threads.
+    """
+    if "store" not in st.session_state:
+        logger.info("Initializing image store for frontend.")
+        st.session_state.store = OBImageStore(
+            client=build_client(),
+        )
+    return st.session_state.store
 
 
 def render_search_panel(
@@ -252,22 +414,22 @@ def render_search_panel(
     distance_threshold: float,
     show_distance: bool,
     show_file_path: bool,
-    tmp_path: Path,
+    queries_dir: Path,
 ) -> None:
     # Image search section
     col1, col2 = st.columns([4, 1])
     with col1:
         uploaded_image = st.file_uploader(
-            label=t("image_upload_label"),
+            label=STR.image_upload_label,
             type=["jpg", "jpeg", "png"],
-            help=t("image_upload_help"),
+            help=STR.image_upload_help,
         )
     with col2:
         # Add empty label to align with file_uploader
         st.write("")  # Spacer to align with file_uploader label
         # Always show search button, but disable it when no image uploaded
         image_search_button = st.button(
-            t("image_search_button"),
+            STR.image_search_button,
             key="image_search_btn",
             use_container_width=True,
             disabled=(uploaded_image is None),
@@ -283,22 +445,22 @@ def render_search_panel(
             distance_threshold,
             show_distance,
             show_file_path,
-            tmp_path,
+            queries_dir,
         )
 
     # Text search section (commented out - no longer exposed to users)
     # st.divider()
-    # st.subheader(t("text_search_header"))
+    # st.subheader(STR.text_search_header)
     # col1, col2 = st.columns([4, 1])
     # with col1:
     #     query_text = st.text_input(
-    #         label=t("text_search_label"),
-    #         placeholder=t("text_search_placeholder"),
+    #         label=STR.text_search_label,
+    #         placeholder=STR.text_search_placeholder,
     #         label_visibility="collapsed",
     #     )
     # with col2:
     #     text_search_button = st.button(
-    #         t("search_button"),
+    #         STR.search_button,
     #         key="text_search_btn",
     #         use_container_width=True,
     #     )
@@ -313,7 +475,7 @@ def render_search_panel(
     #         show_file_path,
     #     )
     # elif text_search_button and not query_text:
-    #     st.warning(t("text_search_empty_warning"))
+    #     st.warning(STR.text_search_empty_warning)
 
 
 def render_text_search_results(
@@ -327,12 +489,12 @@ def render_text_search_results(
     col1, col2 = st.columns(2)
     
     # Left column: show query text
-    col1.subheader(t("text_search_query_header"))
-    col1.caption(t("text_search_query_caption"))
+    col1.subheader(STR.text_search_query_header)
+    col1.caption(STR.text_search_query_caption)
     col1.write(f"**{query_text}**")
 
     # Right column: show search results
-    col2.subheader(t("search_results_header"))
+    col2.subheader(STR.search_results_header)
     
     # Use pure text search based on caption fulltext index
     results = store.text_search(query_text, limit=top_k)
@@ -365,14 +527,13 @@ def main() -> None:
 
     store = init_store()
 
-    table_exist = store.client.has_collection(table_name)
     if click_load:
         if not selected_archive:
-            st.error(t("set_image_base_pls"))
+            st.error(STR.set_image_base_pls)
             logger.warning("Load clicked but no archive selected.")
         else:
             load_images_from_archive(store, selected_archive, table_name, paths)
-    elif table_exist:
+    elif store.has_table(table_name):
         render_search_panel(
             store,
             table_name,
@@ -381,7 +542,7 @@ def main() -> None:
             distance_threshold,
             show_distance,
             show_file_path,
-            paths.tmp_path,
+            paths.queries_dir,
         )
     else:
         st.warning(t("table_not_exist", table_name))
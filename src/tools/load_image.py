@@ -6,29 +6,6 @@ CLI helper to load images into OceanBase.
 import argparse
 import os
 
-from dotenv import load_dotenv
-
-from common.db import build_client
-from common.image_store import OBImageStore
-from common.logger import get_logger
-
-# Logger for CLI loader
-logger = get_logger(__name__)
-
-# Load environment variables for DB configuration
-load_dotenv()
-logger.info("Environment variables loaded for CLI.")
-
-# Read connection and table configuration from env
-table_name = os.getenv("IMG_TABLE_NAME", "image_search")
-
-# Initialize the image store client
-store = OBImageStore(
-    client=build_client(),
-    table_name=table_name,
-)
-logger.info("Image store initialized for CLI, table '%s'.", table_name)
-
 
 if __name__ == "__main__":
     # Parse CLI arguments for input directory and batch size
@@ -36,7 +13,6 @@ if __name__ == "__main__":
     parser.add_argument(
         "--dir",
         type=str,
-        required=True,
         help="Directory to load images from",
     )
     parser.add_argument(
@@ -45,9 +21,62 @@ if __name__ == "__main__":
         default=32,
         help="Batch size for loading images",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of batches embedded concurrently",
+    )
+    parser.add_argument(
+        "--defer-index",
+        action="store_true",
+        help=(
+            "When loading into an empty table, build the vector index once "
+            "after all images are written instead of updating it per batch"
+        ),
+    )
+    parser.add_argument(
+        "--build-index",
+        action="store_true",
+        help=(
+            "Only build the vector index if it is missing (e.g. after an "
+            "interrupted --defer-index load), then exit"
+        ),
+    )
     args = parser.parse_args()
+    if args.dir is None and not args.build_index:
+        parser.error("--dir is required unless --build-index is given")
+
+    # Imported after parsing so --help and usage errors skip loading the
+    # database and embedding stacks (importing common also loads .env)
+    from common.db import build_client
+    from common.image_store import OBImageStore
+    from common.logger import get_logger
+
+    # Logger for CLI loader
+    logger = get_logger(__name__)
+
+    # Read connection and table configuration from env
+    table_name = os.getenv("IMG_TABLE_NAME", "image_search")
+
+    # Initialize the image store client
+    store = OBImageStore(
+        client=build_client(),
+        table_name=table_name,
+    )
+    logger.info("Image store initialized for CLI, table '%s'.", table_name)
 
-    # Stream load progress until completion
-    for _ in store.load_image_dir(args.dir, args.batch_size):
-        pass
-    logger.info("Images loaded successfully from %s.", args.dir)
+    if args.build_index:
+        # Recovery after an interrupted deferred load
+        store.finalize_ingest()
+        logger.info("Vector index ready on table '%s'.", table_name)
+    else:
+        # Stream load progress until completion
+        for _ in store.load_image_dir(
+            args.dir,
+            args.batch_size,
+            workers=args.workers,
+            defer_index=args.defer_index,
+        ):
+            pass
+        logger.info("Images loaded successfully from %s.", args.dir)